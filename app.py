@@ -1,10 +1,45 @@
 import streamlit as st
-from utils import generate_epics_and_stories, save_output, perform_eda, evaluate_assignments
-from models import BasicNLPModel, AdvancedNLPModel, ReinforcementLearningModel
-from optimization import optimize_workload_knapsack
+from utils import generate_epics_and_stories, evaluate_assignments, EVALUATION_SUITES
+from exporters import assignments_frame, build_eda_figures
+from models import BasicNLPModel, AdvancedNLPModel, ReinforcementLearningModel, assign_stories
+from embeddings import get_load_metrics
+from profiling import profiler
 import json
 import pandas as pd
 
+@st.cache_resource
+def load_model(mode):
+    # One model per mode for the whole server process, shared across sessions and reruns.
+    if mode == "basic":
+        return BasicNLPModel()
+    if mode == "advanced":
+        return AdvancedNLPModel()
+    return ReinforcementLearningModel()
+
+@st.cache_data(max_entries=32)
+def run_pipeline(prd_json, engineers_json, mode, eval_metrics):
+    # Keyed on the uploaded bytes, so widget reruns and repeated clicks reuse the previous result.
+    prd_data = json.loads(prd_json)
+    engineers = json.loads(engineers_json)
+    nlp_model = load_model(mode)
+
+    with profiler.collect() as stage_records:
+        sections = nlp_model.extract_sections(prd_data)
+        epics, user_stories = generate_epics_and_stories(sections)
+        assignments, similarities = assign_stories(nlp_model, mode, user_stories, engineers)
+
+        evaluation_timings = {}
+        evaluation_results = evaluate_assignments(assignments, engineers, sections, prd_data, metrics=eval_metrics,
+                                                  similarities=similarities, timings=evaluation_timings)
+    return {
+        'epics': epics,
+        'user_stories': user_stories,
+        'assignments': assignments,
+        'evaluation': {metric: float(value) for metric, value in evaluation_results.items()},
+        'evaluation_timings': evaluation_timings,
+        'stage_records': stage_records,
+    }
+
 def run_app():
     st.title("PRD Automation Pipeline")
     st.write("Upload your PRD JSON file and Engineer profiles JSON file to process them into Epics, User Stories, and Task Assignments.")
@@ -14,35 +49,23 @@ def run_app():
     engineer_file = st.file_uploader("Upload Engineer Profiles JSON File", type=["json"])
 
     if prd_file and engineer_file:
-        prd_data = json.load(prd_file)
-        engineers = json.load(engineer_file)
+        prd_json = prd_file.getvalue().decode('utf-8')
+        engineers_json = engineer_file.getvalue().decode('utf-8')
+        prd_data = json.loads(prd_json)
+        engineers = json.loads(engineers_json)
 
         # Pipeline mode selection
         mode = st.selectbox("Select the mode of the pipeline:", ["basic", "advanced", "optimized"])
+        eval_metrics = st.selectbox("Select the evaluation suite:", list(EVALUATION_SUITES), index=EVALUATION_SUITES.index('full'))
 
         if st.button("Run Pipeline"):
-            st.info(f"Processing the PRD and Engineer Profiles in {mode} mode...")
-
-            # Initialize the model based on the selected mode
-            if mode == "basic":
-                nlp_model = BasicNLPModel()
-            elif mode == "advanced":
-                nlp_model = AdvancedNLPModel()
-            else:
-                nlp_model = ReinforcementLearningModel()
+            st.session_state['pipeline_run'] = (mode, eval_metrics)
 
-            # Extract PRD sections
-            sections = nlp_model.extract_sections(prd_data)
-
-            # Generate epics and user stories
-            epics, user_stories = generate_epics_and_stories(sections)
-
-            # Task assignment based on mode
-            if mode == 'optimized':
-                initial_assignments = nlp_model.assign_tasks(user_stories, engineers)
-                assignments = optimize_workload_knapsack(initial_assignments, engineers)
-            else:
-                assignments = nlp_model.assign_tasks(user_stories, engineers)
+        # Keep showing the last run across reruns triggered by other widgets; results come from the cache.
+        if st.session_state.get('pipeline_run') == (mode, eval_metrics):
+            st.info(f"Processing the PRD and Engineer Profiles in {mode} mode...")
+            result = run_pipeline(prd_json, engineers_json, mode, eval_metrics)
+            epics, user_stories, assignments = result['epics'], result['user_stories'], result['assignments']
 
             # Display generated epics and user stories in tables
             st.subheader("Generated Epics")
@@ -54,27 +77,40 @@ def run_app():
             st.dataframe(stories_df, height=300)
 
             st.subheader("Task Assignments")
-            assignments_df = pd.DataFrame(assignments, columns=["User Story", "Assigned Engineer"])
+            assignments_df = assignments_frame(assignments)
             st.dataframe(assignments_df, height=300)
 
             # Provide download options for JSON and CSV outputs
-            json_output = json.dumps({'epics': epics, 'user_stories': user_stories, 'assignments': assignments}, indent=4)
+            json_output = json.dumps({'epics': epics, 'user_stories': user_stories, 'assignments': assignments.to_pairs()},
+                                     indent=4)
             csv_output = assignments_df.to_csv(index=False)
 
             st.download_button("Download JSON", data=json_output, file_name='output.json', mime='application/json')
             st.download_button("Download CSV", data=csv_output, file_name='output.csv', mime='text/csv')
 
             # Evaluate task assignments
-            evaluation_results = evaluate_assignments(assignments, engineers, sections, prd_data)
             st.subheader("Evaluation Metrics")
-            eval_df = pd.DataFrame(list(evaluation_results.items()), columns=['Metric', 'Value'])
+            eval_df = pd.DataFrame(list(result['evaluation'].items()), columns=['Metric', 'Value'])
             st.bar_chart(eval_df.set_index('Metric'))
+            timings_df = pd.DataFrame(list(result['evaluation_timings'].items()), columns=['Metric', 'Seconds'])
+            st.dataframe(timings_df, height=200)
 
             # Perform EDA and show images
             st.subheader("Exploratory Data Analysis (EDA)")
-            perform_eda(prd_data, engineers)
-            st.image('eda_prd_overview.png', caption='PRD Overview')
-            st.image('eda_engineer_roles.png', caption='Engineer Roles Distribution')
+            figures = build_eda_figures(prd_data, engineers)
+            st.pyplot(figures['eda_prd_overview.png'])
+            st.caption('PRD Overview')
+            st.pyplot(figures['eda_engineer_roles.png'])
+            st.caption('Engineer Roles Distribution')
+            for figure in figures.values():
+                figure.clear()
+
+            st.caption(f"Embedding model load metrics: {get_load_metrics()}")
+
+            st.subheader("Pipeline Stage Timings")
+            stage_df = pd.DataFrame(result['stage_records'],
+                                    columns=['stage', 'wall_seconds', 'cpu_seconds', 'peak_rss_mb', 'items'])
+            st.dataframe(stage_df, height=300)
 
 if __name__ == "__main__":
     run_app()
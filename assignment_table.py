@@ -0,0 +1,86 @@
+import numpy as np
+
+
+# Columnar assignment result. Story texts stay in the caller's list and engineers in the
+# roster; each row only holds an integer story id, an engineer index and a score, so no
+# stage copies story strings. Iterating still yields (story, engineer name) pairs, built
+# on demand, for callers and exporters that expect tuples.
+class AssignmentTable:
+    __slots__ = ('stories', 'engineers', 'story_ids', 'engineer_indices', 'scores')
+
+    def __init__(self, stories, engineers, engineer_indices, scores=None, story_ids=None):
+        self.stories = stories
+        self.engineers = engineers
+        self.engineer_indices = np.asarray(engineer_indices, dtype=np.int64)
+        if story_ids is None:
+            story_ids = np.arange(len(self.engineer_indices), dtype=np.int64)
+        self.story_ids = np.asarray(story_ids, dtype=np.int64)
+        self.scores = None if scores is None else np.asarray(scores, dtype=np.float32)
+
+    @classmethod
+    def from_similarities(cls, stories, engineers, chosen, similarities):
+        chosen = np.asarray(chosen, dtype=np.int64)
+        scores = np.asarray(similarities)[np.arange(len(chosen)), chosen]
+        return cls(stories, engineers, chosen, scores)
+
+    @classmethod
+    def from_pairs(cls, pairs, engineers):
+        eng_index = {eng['name']: idx for idx, eng in enumerate(engineers)}
+        stories = []
+        indices = []
+        for story, engineer in pairs:
+            stories.append(story)
+            indices.append(eng_index[engineer])
+        return cls(stories, engineers, indices)
+
+    def with_choice(self, engineer_indices, scores=None):
+        return AssignmentTable(self.stories, self.engineers, engineer_indices, scores, self.story_ids)
+
+    def rescored(self, similarities):
+        # Same choice, scored against another matrix (plain cosine after a policy re-ranked solve).
+        return self.with_choice(self.engineer_indices, np.asarray(similarities)[self.story_ids, self.engineer_indices])
+
+    def __len__(self):
+        return len(self.engineer_indices)
+
+    def __getitem__(self, row):
+        return self.stories[self.story_ids[row]], self.engineers[self.engineer_indices[row]]['name']
+
+    def __iter__(self):
+        return zip(self.story_texts(), self.engineer_names())
+
+    def __repr__(self):
+        # Logged after every assignment stage, so it summarizes workloads instead of listing stories.
+        workloads = self.workloads()
+        busy = np.flatnonzero(workloads)
+        return (f"AssignmentTable({len(self)} stories, "
+                f"workloads={dict(zip(self.engineer_names(busy), workloads[busy].tolist()))})")
+
+    def story_texts(self):
+        if len(self.story_ids) == len(self.stories) and np.array_equal(self.story_ids, np.arange(len(self.stories))):
+            return self.stories
+        return [self.stories[story_id] for story_id in self.story_ids]
+
+    def engineer_names(self, engineer_indices=None):
+        names = np.array([eng['name'] for eng in self.engineers], dtype=object)
+        return names[self.engineer_indices if engineer_indices is None else engineer_indices].tolist()
+
+    def workloads(self):
+        return np.bincount(self.engineer_indices, minlength=len(self.engineers))
+
+    def to_pairs(self):
+        return list(self)
+
+
+def as_assignment_table(assignments, engineers):
+    if isinstance(assignments, AssignmentTable):
+        return assignments
+    return AssignmentTable.from_pairs(assignments, engineers)
+
+
+def assignment_columns(assignments):
+    # (story texts, engineer names) for exporters; only here are names resolved per row.
+    if isinstance(assignments, AssignmentTable):
+        return assignments.story_texts(), assignments.engineer_names()
+    pairs = list(assignments)
+    return [story for story, _ in pairs], [engineer for _, engineer in pairs]
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from embeddings import normalize_embeddings
+from exporters import atomic_write
+from ingestion import iter_json_documents
+
+FEEDBACK_ACTIONS = ('accept', 'reject', 'reassign')
+
+
+def story_key(story):
+    return hashlib.sha1(story.encode('utf-8')).hexdigest()
+
+
+def feedback_rewards(record):
+    # (engineer name, reward) updates for one feedback record.
+    action = record.get('action', 'accept')
+    if action not in FEEDBACK_ACTIONS:
+        raise ValueError(f"Unknown feedback action '{action}', expected one of {FEEDBACK_ACTIONS}")
+    if action == 'accept':
+        return [(record['engineer'], 1.0)]
+    if action == 'reject':
+        return [(record['engineer'], -1.0)]
+    return [(record['engineer'], -1.0), (record['reassigned_to'], 1.0)]
+
+
+# Append-only JSON lines log of every feedback record the policy has learned from, so the
+# policy can be rebuilt or evaluated offline by replaying it in order.
+class FeedbackLog:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, records):
+        with self._lock, open(self.path, 'a', encoding='utf-8') as out:
+            for record in records:
+                out.write(json.dumps(dict(record, logged_at=record.get('logged_at', time.time())),
+                                     separators=(',', ':')))
+                out.write('\n')
+
+    def __iter__(self):
+        if not os.path.exists(self.path):
+            return iter(())
+        return iter_json_documents(self.path)
+
+
+# Contextual bandit over story embeddings: one ridge-regression reward model per engineer with
+# a diagonal precision, so a feedback update touches d numbers per engineer and scoring a batch
+# of stories is two (stories x d) @ (d x engineers) products. The UCB bonus favours engineers
+# with little feedback on similar stories. Until the first update scores pass through unchanged.
+class LinearBandit:
+    def __init__(self, alpha=0.02, reward_weight=0.1, ridge=1.0, max_remembered=10000):
+        self.alpha = alpha
+        self.reward_weight = reward_weight
+        self.ridge = ridge
+        self.max_remembered = max_remembered
+        self.names = []
+        self.precision = None
+        self.weights = None
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.updates = 0
+        self._positions = {}
+        self._remembered = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _rows(self, names, dim):
+        if self.precision is None:
+            self.precision = np.zeros((0, dim), dtype=np.float32)
+            self.weights = np.zeros((0, dim), dtype=np.float32)
+        new_names = list(OrderedDict.fromkeys(name for name in names if name not in self._positions))
+        if new_names:
+            for name in new_names:
+                self._positions[name] = len(self.names)
+                self.names.append(name)
+            self.precision = np.vstack([self.precision, np.full((len(new_names), dim), self.ridge, dtype=np.float32)])
+            self.weights = np.vstack([self.weights, np.zeros((len(new_names), dim), dtype=np.float32)])
+            self.counts = np.concatenate([self.counts, np.zeros(len(new_names), dtype=np.int64)])
+        return np.array([self._positions[name] for name in names], dtype=np.int64)
+
+    def remember(self, stories, story_embeddings):
+        # Embeddings of recently scored stories, so feedback on them needs no encoder pass.
+        story_embeddings = normalize_embeddings(np.asarray(story_embeddings, dtype=np.float32))
+        with self._lock:
+            for story, embedding in zip(stories, story_embeddings):
+                key = story_key(story)
+                self._remembered[key] = embedding
+                self._remembered.move_to_end(key)
+            while len(self._remembered) > self.max_remembered:
+                self._remembered.popitem(last=False)
+
+    def adjust(self, similarities, story_embeddings, engineers):
+        if not self.updates:
+            return similarities
+        stories = normalize_embeddings(np.asarray(story_embeddings, dtype=np.float32))
+        with self._lock:
+            rows = self._rows([eng['name'] for eng in engineers], stories.shape[1])
+            inverse = 1.0 / self.precision[rows]
+            weights = self.weights[rows]
+        estimate = stories @ weights.T
+        bonus = np.sqrt((stories * stories) @ inverse.T)
+        return np.asarray(similarities) + self.reward_weight * estimate + self.alpha * bonus
+
+    def update(self, story_embedding, engineer, reward):
+        embedding = normalize_embeddings(np.asarray(story_embedding, dtype=np.float32))
+        with self._lock:
+            row = self._rows([engineer], len(embedding))[0]
+            # Online ridge step with a per-dimension (diagonal) step size: moves the estimate for this
+            # engineer towards the observed reward along the story embedding.
+            self.precision[row] += embedding * embedding
+            self.weights[row] += (reward - embedding @ self.weights[row]) * embedding / self.precision[row]
+            self.counts[row] += 1
+            self.updates += 1
+
+    def apply_feedback(self, records, encode=None):
+        # Stories the policy has not scored recently are encoded in one batch (or skipped without `encode`).
+        records = list(records)
+        with self._lock:
+            embeddings = {story_key(record['story']): self._remembered.get(story_key(record['story']))
+                          for record in records}
+        missing = list(OrderedDict.fromkeys(record['story'] for record in records
+                                            if embeddings[story_key(record['story'])] is None))
+        if missing and encode is not None:
+            for story, embedding in zip(missing, encode(missing)):
+                embeddings[story_key(story)] = embedding
+        elif missing:
+            logging.warning("Skipping feedback on %d stories with no remembered embedding", len(missing))
+
+        applied = 0
+        for record in records:
+            embedding = embeddings[story_key(record['story'])]
+            if embedding is None:
+                continue
+            for engineer, reward in feedback_rewards(record):
+                self.update(embedding, engineer, reward)
+            applied += 1
+        logging.info("Applied %d of %d feedback records (%d updates in total)", applied, len(records), self.updates)
+        return applied
+
+    def save(self, path):
+        with self._lock:
+            keys = list(self._remembered)
+            remembered = np.array(list(self._remembered.values()), dtype=np.float32)
+            state = dict(names=np.array(self.names), counts=self.counts, updates=self.updates, alpha=self.alpha,
+                         reward_weight=self.reward_weight, ridge=self.ridge, max_remembered=self.max_remembered,
+                         remembered_keys=np.array(keys), remembered=remembered)
+            if self.precision is not None:
+                state.update(precision=self.precision, weights=self.weights)
+        atomic_write(path, lambda out: np.savez(out, **state), binary=True)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            bandit = cls(alpha=float(state['alpha']), reward_weight=float(state['reward_weight']),
+                         ridge=float(state['ridge']), max_remembered=int(state['max_remembered']))
+            bandit.names = state['names'].tolist()
+            bandit.counts = state['counts']
+            bandit.updates = int(state['updates'])
+            if 'precision' in state.files:
+                bandit.precision = state['precision']
+                bandit.weights = state['weights']
+            bandit._remembered = OrderedDict(zip(state['remembered_keys'].tolist(), state['remembered']))
+        bandit._positions = {name: position for position, name in enumerate(bandit.names)}
+        return bandit
+
+    @classmethod
+    def open(cls, path, **kwargs):
+        # Keyword settings (alpha, reward_weight, ...) also override those saved with the state.
+        if path and os.path.exists(path):
+            bandit = cls.load(path)
+            for name, value in kwargs.items():
+                setattr(bandit, name, value)
+            return bandit
+        return cls(**kwargs)
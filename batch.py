@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from utils import evaluate_assignments
+from story_generation import generate_story_plan
+from ingestion import INGESTORS, iter_documents, load_document
+from embeddings import cosine_similarity_matrix
+from optimization import optimize_workload_knapsack
+from incremental import incremental_assign
+
+
+def iter_prd_jobs(source):
+    if os.path.isdir(source):
+        for file_name in sorted(os.listdir(source)):
+            stem, extension = os.path.splitext(file_name)
+            if extension.lower() in INGESTORS and extension.lower() != '.jsonl':
+                yield {'id': stem, 'prd_file': os.path.join(source, file_name)}
+        return
+    if not source.endswith('.jsonl'):
+        yield from iter_document_jobs(source)
+        return
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, 'r') as manifest:
+        for line_number, line in enumerate(manifest, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            job = {'id': f'line-{line_number}'}
+            try:
+                entry = json.loads(line)
+            except ValueError as exc:
+                job['error'] = f"Invalid manifest line: {exc}"
+                yield job
+                continue
+            if not isinstance(entry, dict):
+                job['error'] = f"Invalid manifest line: expected a JSON object, got {type(entry).__name__}"
+                yield job
+                continue
+            if 'prd_file' in entry:
+                job['prd_file'] = os.path.join(base_dir, entry['prd_file'])
+                job['id'] = entry.get('id', os.path.splitext(os.path.basename(entry['prd_file']))[0])
+            else:
+                job['prd'] = entry.get('prd', entry)
+                job['id'] = entry.get('id', job['prd'].get('product_name', job['id']))
+            yield job
+
+
+def iter_document_jobs(path):
+    # One job per document of a multi-document export, read one document at a time.
+    stem = os.path.splitext(os.path.basename(path))[0]
+    count = 0
+    try:
+        for prd in iter_documents(path):
+            yield {'id': f"{stem}-{count}", 'prd': prd}
+            count += 1
+    except Exception as exc:
+        logging.exception("Reading %s stopped after %d documents", path, count)
+        yield {'id': f"{stem}-{count}", 'error': f"ingest: {exc}"}
+
+
+def bounded_map(executor, fn, items, max_in_flight):
+    # Like executor.map, but pulls from `items` lazily so only `max_in_flight` jobs are buffered.
+    items = iter(items)
+    pending = deque(executor.submit(fn, item) for item in islice(items, max_in_flight))
+    while pending:
+        yield pending.popleft().result()
+        for item in islice(items, 1):
+            pending.append(executor.submit(fn, item))
+
+
+def job_name(job):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(job['id']))
+
+
+def run_stage(stage_name, fn, job):
+    if 'error' in job:
+        return job
+    try:
+        fn(job)
+    except Exception as exc:
+        logging.exception("Batch job %s failed during %s", job['id'], stage_name)
+        job['error'] = f"{stage_name}: {exc}"
+    return job
+
+
+def prepare_jobs(jobs, nlp_model, executor, max_in_flight):
+    def prepare(job):
+        if 'prd' not in job:
+            job['prd'] = load_document(job['prd_file'])
+        job['sections'] = nlp_model.extract_sections(job['prd'])
+        job['story_plan'] = generate_story_plan(job['sections'])
+        job['epics'], job['user_stories'] = job['story_plan'].epics, job['story_plan'].user_stories
+
+    return bounded_map(executor, lambda job: run_stage('prepare', prepare, job), jobs, max_in_flight)
+
+
+def assign_jobs(jobs, nlp_model, engineers, mode, batch_docs, output_dir, incremental, sharder=None):
+    engineer_embeddings = None
+    while True:
+        chunk = list(islice(jobs, batch_docs))
+        if not chunk:
+            return
+        ready = [job for job in chunk if 'error' not in job]
+
+        if incremental and mode != 'basic':
+            # Each document only re-embeds its own edited requirements against its saved state.
+            for job in chunk:
+                yield run_stage('assign', lambda job: incremental_job(job, nlp_model, engineers, mode, output_dir), job)
+            continue
+
+        if mode != 'basic' and ready:
+            # One encode call for every story in the chunk, then split the matrix per document.
+            try:
+                if engineer_embeddings is None:
+                    engineer_embeddings = nlp_model.encode([eng['skills'] for eng in engineers])
+                story_embeddings = nlp_model.encode([story for job in ready for story in job['user_stories']])
+                similarities = cosine_similarity_matrix(story_embeddings, engineer_embeddings)
+            except Exception as exc:
+                logging.exception("Batch encode failed for %d documents", len(ready))
+                for job in ready:
+                    job['error'] = f"encode: {exc}"
+            else:
+                offset = 0
+                for job in ready:
+                    rows = slice(offset, offset + len(job['user_stories']))
+                    job['similarities'] = similarities[rows]
+                    job['solver_scores'] = nlp_model.adjust_scores(job['user_stories'], engineers, similarities[rows],
+                                                                   story_embeddings[rows])
+                    offset += len(job['user_stories'])
+
+        for job in chunk:
+            yield run_stage('assign', lambda job: assign_job(job, nlp_model, engineers, mode, sharder), job)
+
+
+def assign_job(job, nlp_model, engineers, mode, sharder=None):
+    if mode == 'basic':
+        job['assignments'] = nlp_model.assign_tasks(job['user_stories'], engineers)
+        return
+    # Policy-adjusted scores only drive the solver; evaluation and exports keep the cosine scores.
+    solver_scores = job.pop('solver_scores')
+    if sharder is not None:
+        assignments = sharder.assign(job['user_stories'], engineers, solver_scores,
+                                     solver='lap' if mode == 'optimized' else 'greedy', story_plan=job['story_plan'])
+    else:
+        assignments = nlp_model.assign_tasks(job['user_stories'], engineers, solver_scores)
+        if mode == 'optimized':
+            assignments = optimize_workload_knapsack(assignments, engineers, solver_scores)
+    job['assignments'] = assignments.rescored(job['similarities'])
+
+
+def incremental_job(job, nlp_model, engineers, mode, output_dir):
+    state_path = os.path.join(output_dir, f"{job_name(job)}.state.npz")
+    job['epics'], job['user_stories'], job['assignments'], job['similarities'] = incremental_assign(
+        job['sections'], engineers, nlp_model, mode, state_path, job['story_plan'])
+
+
+def evaluate_jobs(jobs, engineers, embedding_cache, executor, max_in_flight, eval_metrics, eval_sample_size,
+                  lexical_engine=None):
+    def evaluate(job):
+        job['evaluation_timings'] = {}
+        job['evaluation'] = evaluate_assignments(job['assignments'], engineers, job['sections'], job['prd'],
+                                                 embedding_cache=embedding_cache, metrics=eval_metrics,
+                                                 sample_size=eval_sample_size, similarities=job.get('similarities'),
+                                                 timings=job['evaluation_timings'], lexical_engine=lexical_engine)
+
+    return bounded_map(executor, lambda job: run_stage('evaluate', evaluate, job), jobs, max_in_flight)
+
+
+def run_batch(source, engineers, nlp_model, mode, output_dir, exporter, workers=4, batch_docs=8, embedding_cache=None,
+              eval_metrics='full', eval_sample_size=50, incremental=False, lexical_engine=None, sharder=None):
+    os.makedirs(output_dir, exist_ok=True)
+    summary = {'succeeded': 0, 'failed': 0}
+    max_in_flight = max(workers, batch_docs) * 2
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            open(os.path.join(output_dir, 'batch_results.jsonl'), 'a') as results_file:
+        jobs = prepare_jobs(iter_prd_jobs(source), nlp_model, executor, max_in_flight)
+        jobs = assign_jobs(jobs, nlp_model, engineers, mode, batch_docs, output_dir, incremental, sharder)
+        jobs = evaluate_jobs(jobs, engineers, embedding_cache, executor, max_in_flight,
+                             eval_metrics, eval_sample_size, lexical_engine)
+
+        for job in jobs:
+            record = {'id': job['id']}
+            if 'assignments' in job:
+                # Exports are queued even when evaluation failed so the assignments are not lost.
+                name = job_name(job)
+                exporter.submit(name, job['epics'], job['user_stories'], job['assignments'],
+                                prd_data=job['prd'], engineers=engineers, story_plan=job['story_plan'])
+                record['output_prefix'] = os.path.join(output_dir, name)
+            if 'error' in job:
+                record['status'] = 'failed'
+                record['error'] = job['error']
+                summary['failed'] += 1
+            else:
+                record['status'] = 'ok'
+                record['evaluation'] = {metric: float(value) for metric, value in job['evaluation'].items()}
+                record['evaluation_timings'] = job['evaluation_timings']
+                summary['succeeded'] += 1
+            results_file.write(json.dumps(record) + '\n')
+            results_file.flush()
+            logging.info("Batch job %s finished with status %s", job['id'], record['status'])
+
+    logging.info("Batch run finished: %s", summary)
+    return summary
@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings import cosine_similarity_matrix
+from optimization import assignment_objective, engineer_capacities, greedy_workload_assignment, solve_capacitated_assignment
+
+
+def random_similarities(num_tasks, num_engineers, dim, rng):
+    stories = rng.normal(size=(num_tasks, dim)).astype(np.float32)
+    engineers = rng.normal(size=(num_engineers, dim)).astype(np.float32)
+    return cosine_similarity_matrix(stories, engineers)
+
+
+def run_case(num_tasks, num_engineers, dim, seed):
+    rng = np.random.default_rng(seed)
+    similarities = random_similarities(num_tasks, num_engineers, dim, rng)
+    capacities = engineer_capacities([{}] * num_engineers, num_tasks)
+
+    start = time.perf_counter()
+    greedy, _ = greedy_workload_assignment(similarities)
+    greedy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    solved = solve_capacitated_assignment(similarities, capacities)
+    solver_seconds = time.perf_counter() - start
+
+    return {
+        'tasks': num_tasks,
+        'engineers': num_engineers,
+        'greedy': {
+            'objective': assignment_objective(similarities, greedy),
+            'max_load': int(np.bincount(greedy, minlength=num_engineers).max()),
+            'seconds': greedy_seconds,
+        },
+        'capacitated_lap': {
+            'objective': assignment_objective(similarities, solved),
+            'max_load': int(np.bincount(solved, minlength=num_engineers).max()),
+            'seconds': solver_seconds,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare greedy assign_tasks scoring with the capacitated LAP solver')
+    parser.add_argument('--sizes', type=str, default='100x10,1000x100,3000x200,5000x300',
+                        help='Comma-separated TASKSxENGINEERS cases')
+    parser.add_argument('--dim', type=int, default=384, help='Embedding dimension of the synthetic vectors')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for case in args.sizes.split(','):
+        num_tasks, num_engineers = (int(value) for value in case.lower().split('x'))
+        results.append(run_case(num_tasks, num_engineers, args.dim, args.seed))
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from assignment_table import AssignmentTable
+from synthetic import generate_prd, generate_roster
+from utils import generate_epics_and_stories
+
+
+def traced_bytes(fn):
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def tuple_stages(user_stories, engineers, chosen):
+    # What assign_tasks -> optimize_workload_knapsack -> evaluate_assignments used to build.
+    assignments = [(story, engineers[eng_idx]['name']) for story, eng_idx in zip(user_stories, chosen)]
+    stories = [story for story, _ in assignments]
+    optimized = [(story, engineers[eng_idx]['name']) for story, eng_idx in zip(stories, chosen)]
+    workloads = {eng['name']: 0 for eng in engineers}
+    for _, engineer in optimized:
+        workloads[engineer] += 1
+    return optimized
+
+
+def table_stages(user_stories, engineers, chosen):
+    assignments = AssignmentTable(user_stories, engineers, chosen, np.zeros(len(chosen)))
+    optimized = assignments.with_choice(chosen, assignments.scores)
+    optimized.workloads()
+    return optimized
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak allocations of tuple-list vs. columnar assignment results')
+    parser.add_argument('--stories', type=str, default='1000,10000,50000', help='Comma-separated story counts')
+    parser.add_argument('--engineers', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    engineers = generate_roster(args.engineers, seed=args.seed)
+    results = []
+    for num_stories in (int(value) for value in args.stories.split(',')):
+        prd_data = generate_prd(max(1, num_stories // 10), 10, seed=args.seed)
+        _, user_stories = generate_epics_and_stories(prd_data)
+        chosen = np.random.default_rng(args.seed).integers(len(engineers), size=len(user_stories))
+        _, tuple_peak = traced_bytes(lambda: tuple_stages(user_stories, engineers, chosen))
+        _, table_peak = traced_bytes(lambda: table_stages(user_stories, engineers, chosen))
+        results.append({
+            'stories': len(user_stories),
+            'tuple_list_peak_bytes': tuple_peak,
+            'assignment_table_peak_bytes': table_peak,
+            'tuple_list_bytes_per_story': tuple_peak / len(user_stories),
+            'assignment_table_bytes_per_story': table_peak / len(user_stories),
+        })
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
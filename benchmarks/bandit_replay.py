@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bandit import FeedbackLog, LinearBandit, feedback_rewards
+from embeddings import DEFAULT_MODEL_NAME, cosine_similarity_matrix, encode_texts, register_embedding_model
+from synthetic import HashingEncoder, generate_prd, generate_roster
+from utils import generate_epics_and_stories
+
+STUB_MODEL_NAME = 'stub-hashing-encoder'
+
+
+def target_engineer(record):
+    if record.get('action', 'accept') == 'reassign':
+        return record['reassigned_to']
+    return record['engineer'] if record.get('action', 'accept') == 'accept' else None
+
+
+def simulate_feedback(log_path, engineers, model_name, num_stories, preference_strength, seed, **policy_args):
+    # Reviewers follow a hidden per-engineer preference on top of skill similarity. The policy assigns
+    # each story online and the reviewer accepts it or reassigns it to the engineer they prefer.
+    rng = np.random.default_rng(seed)
+    prd = generate_prd(max(1, num_stories // 50), 50, seed=seed)
+    _, stories = generate_epics_and_stories({'functional_requirements': prd['functional_requirements']})
+    stories = [stories[idx] for idx in rng.integers(len(stories), size=num_stories)]
+    story_embeddings = encode_texts(stories, model_name=model_name)
+    engineer_embeddings = encode_texts([eng['skills'] for eng in engineers], model_name=model_name)
+    hidden = rng.normal(size=(len(engineers), story_embeddings.shape[1])).astype(np.float32)
+    true_scores = (cosine_similarity_matrix(story_embeddings, engineer_embeddings)
+                   + preference_strength * cosine_similarity_matrix(story_embeddings, hidden))
+    truth = np.argmax(true_scores, axis=1)
+
+    policy = LinearBandit(**policy_args)
+    log = FeedbackLog(log_path)
+    for idx, story in enumerate(stories):
+        scores = policy.adjust(cosine_similarity_matrix(story_embeddings[idx:idx + 1], engineer_embeddings),
+                               story_embeddings[idx:idx + 1], engineers)[0]
+        chosen = engineers[int(np.argmax(scores))]['name']
+        record = {'story': story, 'engineer': chosen, 'action': 'accept'}
+        if chosen != engineers[truth[idx]]['name']:
+            record.update(action='reassign', reassigned_to=engineers[truth[idx]]['name'])
+        log.append([record])
+        policy.remember([story], story_embeddings[idx:idx + 1])
+        policy.apply_feedback([record])
+
+
+def replay(log_path, engineers, model_name, **policy_args):
+    # Progressive validation: every record is predicted by the policy trained on the records before it.
+    records = list(FeedbackLog(log_path))
+    stories = list(dict.fromkeys(record['story'] for record in records))
+    story_embeddings = dict(zip(stories, encode_texts(stories, model_name=model_name)))
+    engineer_embeddings = encode_texts([eng['skills'] for eng in engineers], model_name=model_name)
+    names = [eng['name'] for eng in engineers]
+
+    policy = LinearBandit(**policy_args)
+    base_hits, policy_hits = [], []
+    score_seconds = update_seconds = 0.0
+    for record in records:
+        embedding = story_embeddings[record['story']][np.newaxis, :]
+        target = target_engineer(record)
+        base = cosine_similarity_matrix(embedding, engineer_embeddings)
+        start = time.perf_counter()
+        adjusted = policy.adjust(base, embedding, engineers)
+        score_seconds += time.perf_counter() - start
+        if target in names:
+            base_hits.append(names[int(np.argmax(base))] == target)
+            policy_hits.append(names[int(np.argmax(adjusted))] == target)
+        start = time.perf_counter()
+        for engineer, reward in feedback_rewards(record):
+            policy.update(embedding[0], engineer, reward)
+        update_seconds += time.perf_counter() - start
+
+    half = len(policy_hits) // 2
+    return {
+        'records': len(records),
+        'cosine_top1': float(np.mean(base_hits)) if base_hits else None,
+        'policy_top1': float(np.mean(policy_hits)) if policy_hits else None,
+        'policy_top1_second_half': float(np.mean(policy_hits[half:])) if policy_hits[half:] else None,
+        'mean_score_microseconds': 1e6 * score_seconds / max(1, len(records)),
+        'mean_update_microseconds': 1e6 * update_seconds / max(1, policy.updates),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a feedback log through a fresh policy and report '
+                                                 'progressive top-1 accuracy against plain cosine ranking')
+    parser.add_argument('--feedback_log', type=str, required=True,
+                        help='Feedback log to replay (written first when --simulate is given)')
+    parser.add_argument('--engineers', type=str, default=None,
+                        help='Engineer roster JSON; defaults to a synthetic roster')
+    parser.add_argument('--encoder', type=str, choices=['stub', 'minilm'], default='stub')
+    parser.add_argument('--simulate', type=int, default=0,
+                        help='Generate this many simulated feedback records before replaying')
+    parser.add_argument('--engineers_count', type=int, default=20, help='Synthetic roster size')
+    parser.add_argument('--preference_strength', type=float, default=0.5,
+                        help='Weight of the hidden reviewer preference in simulated feedback')
+    parser.add_argument('--alpha', type=float, default=0.02, help='Policy exploration bonus weight')
+    parser.add_argument('--reward_weight', type=float, default=0.1, help='Policy learned-reward weight')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    policy_args = {'alpha': args.alpha, 'reward_weight': args.reward_weight}
+
+    model_name = DEFAULT_MODEL_NAME
+    if args.encoder == 'stub':
+        model_name = STUB_MODEL_NAME
+        register_embedding_model(model_name, HashingEncoder())
+    if args.engineers:
+        with open(args.engineers, 'r') as file:
+            engineers = json.JSONDecoder().raw_decode(file.read())[0]
+    else:
+        engineers = generate_roster(args.engineers_count, seed=args.seed)
+
+    if args.simulate:
+        if os.path.exists(args.feedback_log):
+            os.remove(args.feedback_log)
+        simulate_feedback(args.feedback_log, engineers, model_name, args.simulate, args.preference_strength,
+                          args.seed, **policy_args)
+    print(json.dumps(replay(args.feedback_log, engineers, model_name, **policy_args), indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from scipy.stats import spearmanr
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from embeddings import (DEFAULT_MODEL_NAME, EMBEDDING_BACKENDS, cosine_similarity_matrix, load_embedding_backend,
+                        normalize_embeddings)
+from profiling import peak_rss_mb
+from utils import generate_epics_and_stories
+
+
+def load_sample(path):
+    # The sample files in data/ carry trailing note lines after the JSON document.
+    with open(path, 'r') as file:
+        return json.JSONDecoder().raw_decode(file.read())[0]
+
+
+def sample_texts(prd_file, engineers_file):
+    prd_data = load_sample(prd_file)
+    _, user_stories = generate_epics_and_stories({
+        'objectives': prd_data.get('objectives', []),
+        'functional_requirements': prd_data.get('functional_requirements', {}),
+        'user_personas': prd_data.get('user_personas', []),
+    })
+    return user_stories, [eng['skills'] for eng in load_sample(engineers_file)]
+
+
+def time_encode(model, texts, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vectors = model.encode(texts, batch_size=64, convert_to_numpy=True)
+        latencies.append(time.perf_counter() - start)
+    return np.asarray(vectors, dtype=np.float32), statistics.median(latencies)
+
+
+def compare(reference, candidate, num_stories):
+    ref_scores = cosine_similarity_matrix(reference[:num_stories], reference[num_stories:])
+    scores = cosine_similarity_matrix(candidate[:num_stories], candidate[num_stories:])
+    vector_cosines = np.einsum('ij,ij->i', normalize_embeddings(reference), normalize_embeddings(candidate))
+    rank_correlations = [spearmanr(ref_row, row).correlation for ref_row, row in zip(ref_scores, scores)
+                         if len(ref_row) > 1]
+    return {
+        'min_vector_cosine': float(vector_cosines.min()),
+        'max_score_abs_diff': float(np.abs(ref_scores - scores).max()),
+        'top1_agreement': float(np.mean(ref_scores.argmax(axis=1) == scores.argmax(axis=1))),
+        'min_rank_correlation': float(np.nanmin(rank_correlations)) if rank_correlations else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parity and speed of embedding backends against fp32 PyTorch')
+    parser.add_argument('--model_dir', type=str, default=None,
+                        help='Local model directory (no network access); defaults to the cached hub model')
+    parser.add_argument('--model_name', type=str, default=DEFAULT_MODEL_NAME)
+    parser.add_argument('--backends', type=str, default='int8',
+                        help=f"Comma-separated backends to compare with torch: {', '.join(EMBEDDING_BACKENDS[1:])}")
+    parser.add_argument('--prd_file', type=str, default=os.path.join(ROOT, 'data', 'prd_data.json'))
+    parser.add_argument('--engineers', type=str, default=os.path.join(ROOT, 'data', 'enineer_profile.json'))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.02,
+                        help='Largest allowed absolute difference between fp32 and backend story/engineer cosine scores')
+    args = parser.parse_args()
+
+    user_stories, skills = sample_texts(args.prd_file, args.engineers)
+    texts = user_stories + skills
+
+    results = {}
+    reference = None
+    for backend in ['torch'] + [backend for backend in args.backends.split(',') if backend and backend != 'torch']:
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        model = load_embedding_backend(args.model_name, 'cpu', backend=backend, model_dir=args.model_dir)
+        load_seconds = time.perf_counter() - start
+        vectors, encode_seconds = time_encode(model, texts, args.repeats)
+        result = {
+            'load_seconds': load_seconds,
+            'median_encode_seconds': encode_seconds,
+            'texts': len(texts),
+            'peak_rss_growth_mb': None if rss_before is None else peak_rss_mb() - rss_before,
+        }
+        if reference is None:
+            reference = vectors
+        else:
+            result.update(compare(reference, vectors, len(user_stories)))
+            result['speedup'] = results['torch']['median_encode_seconds'] / encode_seconds
+            result['within_tolerance'] = result['max_score_abs_diff'] <= args.tolerance
+        results[backend] = result
+        del model
+
+    print(json.dumps({'tolerance': args.tolerance, 'backends': results}, indent=4))
+    if not all(result.get('within_tolerance', True) for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings import cosine_similarity_matrix, normalize_embeddings
+from engineer_index import EngineerIndex
+from optimization import greedy_shortlist_assignment, greedy_workload_assignment
+
+
+def clustered_vectors(count, centers, spread, rng):
+    labels = rng.integers(len(centers), size=count)
+    return normalize_embeddings(centers[labels] + spread * rng.normal(size=(count, centers.shape[1])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recall and latency of the engineer index against exact scoring')
+    parser.add_argument('--engineers', type=int, default=20000)
+    parser.add_argument('--stories', type=int, default=2000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--top_k', type=int, default=20)
+    parser.add_argument('--nprobe', type=str, default='1,2,4,8,16,32', help='Comma-separated nprobe values to sweep')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(64, args.dim))
+    engineer_vectors = clustered_vectors(args.engineers, centers, 0.8, rng)
+    story_vectors = clustered_vectors(args.stories, centers, 0.8, rng)
+
+    start = time.perf_counter()
+    similarities = cosine_similarity_matrix(story_vectors, engineer_vectors)
+    exact_top = np.argpartition(-similarities, args.top_k - 1, axis=1)[:, :args.top_k]
+    exact_chosen, _ = greedy_workload_assignment(similarities)
+    exact_seconds = time.perf_counter() - start
+
+    index = EngineerIndex(seed=args.seed)
+    start = time.perf_counter()
+    index.upsert([f'Engineer {idx}' for idx in range(args.engineers)], engineer_vectors)
+    index.rebuild()
+    build_seconds = time.perf_counter() - start
+
+    sweep = []
+    for nprobe in (int(value) for value in args.nprobe.split(',')):
+        start = time.perf_counter()
+        candidates, scores = index.search(story_vectors, args.top_k, nprobe=nprobe)
+        chosen, _ = greedy_shortlist_assignment(candidates, scores, args.engineers)
+        seconds = time.perf_counter() - start
+        recall = np.mean([len(np.intersect1d(found, expected)) / args.top_k
+                          for found, expected in zip(candidates, exact_top)])
+        sweep.append({
+            'nprobe': nprobe,
+            'seconds': seconds,
+            'recall_at_k': float(recall),
+            'same_engineer_as_exact': float(np.mean(chosen == exact_chosen)),
+        })
+
+    print(json.dumps({
+        'engineers': args.engineers,
+        'stories': args.stories,
+        'top_k': args.top_k,
+        'clusters': len(index.centroids),
+        'index_build_seconds': build_seconds,
+        'exact_seconds': exact_seconds,
+        'sweep': sweep,
+    }, indent=4))
+
+
+if __name__ == '__main__':
+    main()
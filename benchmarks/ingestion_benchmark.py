@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ingestion import iter_json_documents, iter_requirement_groups
+from synthetic import generate_prd
+
+
+def write_export(path, num_documents, epics, requirements_per_epic, seed):
+    # Written one document at a time so the generator itself stays small.
+    with open(path, 'w') as out:
+        out.write('[')
+        for idx in range(num_documents):
+            if idx:
+                out.write(',\n')
+            json.dump(generate_prd(epics, requirements_per_epic, seed=seed + idx), out)
+        out.write(']\n')
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'items': count, 'seconds': seconds, 'peak_mb': peak / (1024 * 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak memory of json.load vs. streaming ingestion on a large PRD export')
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--epics', type=int, default=10)
+    parser.add_argument('--requirements_per_epic', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'export.json')
+        write_export(path, args.documents, args.epics, args.requirements_per_epic, args.seed)
+
+        def full_load():
+            with open(path, 'r') as file:
+                return len(json.load(file))
+
+        results = {
+            'file_mb': os.path.getsize(path) / (1024 * 1024),
+            'json_load': measure(full_load),
+            'iter_json_documents': measure(lambda: sum(1 for _ in iter_json_documents(path))),
+            'iter_requirement_groups': measure(lambda: sum(1 for _ in iter_requirement_groups(path))),
+        }
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
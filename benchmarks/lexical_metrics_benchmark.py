@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from nltk.translate.bleu_score import sentence_bleu
+from rouge_score import rouge_scorer
+
+from lexical_metrics import LexicalMetricsEngine, score_pairs
+from synthetic import generate_prd
+
+
+def serial_reference(pairs):
+    # The per-call implementation evaluate_assignments used before the metrics engine.
+    scorer = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
+    return [(sentence_bleu([ref.split()], pred.split()), scorer.score(ref, pred)['rouge1'].fmeasure)
+            for ref, pred in pairs]
+
+
+def build_pairs(num_documents, words, seed):
+    # Reference and prediction sections from pairs of seeded PRDs, as a batch evaluation would see them.
+    pairs = []
+    for idx in range(num_documents):
+        reference = generate_prd(1, 1, words, seed=seed + idx)
+        prediction = generate_prd(1, 1, words, seed=seed + idx + 1)
+        for section in ('objectives', 'user_personas'):
+            pairs.append((' '.join(reference[section]), ' '.join(prediction[section])))
+    return pairs
+
+
+def timed(fn, pairs):
+    start = time.perf_counter()
+    scores = fn(pairs)
+    return scores, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial vs. process-pool BLEU/ROUGE scoring')
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=40, help='Words per generated sentence')
+    parser.add_argument('--processes', type=str, default='2,4', help='Comma-separated pool sizes')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    pairs = build_pairs(args.documents, args.words, args.seed)
+    expected, serial_seconds = timed(serial_reference, pairs)
+    scores, cached_seconds = timed(score_pairs, pairs)
+    results = {
+        'pairs': len(pairs),
+        'serial_seconds': serial_seconds,
+        'in_process': {'seconds': cached_seconds, 'speedup': serial_seconds / cached_seconds,
+                       'exact_match': scores == expected},
+    }
+    for processes in (int(value) for value in args.processes.split(',')):
+        with LexicalMetricsEngine(processes) as engine:
+            engine.score(pairs[:processes])  # start the workers outside the timed run
+            scores, seconds = timed(engine.score, pairs)
+        results[f'processes_{processes}'] = {'seconds': seconds, 'speedup': serial_seconds / seconds,
+                                             'exact_match': scores == expected}
+    print(json.dumps(results, indent=4))
+    if not all(result['exact_match'] for key, result in results.items() if isinstance(result, dict)):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
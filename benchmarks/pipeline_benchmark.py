@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from embeddings import DEFAULT_MODEL_NAME, register_embedding_model
+from models import BasicNLPModel, AdvancedNLPModel, ReinforcementLearningModel, assign_stories
+from profiling import profiler
+from synthetic import HashingEncoder, generate_prd, generate_roster
+from utils import generate_epics_and_stories, evaluate_assignments
+
+STUB_MODEL_NAME = 'stub-hashing-encoder'
+
+
+def build_model(mode, model_name):
+    if mode == 'basic':
+        return BasicNLPModel()
+    if mode == 'advanced':
+        return AdvancedNLPModel(model_name=model_name)
+    return ReinforcementLearningModel(model_name=model_name)
+
+
+def run_pipeline(mode, nlp_model, prd_data, engineers, model_name, eval_metrics):
+    sections = nlp_model.extract_sections(prd_data)
+    epics, user_stories = generate_epics_and_stories(sections)
+
+    assignments, similarities = assign_stories(nlp_model, mode, user_stories, engineers)
+    evaluate_assignments(assignments, engineers, sections, prd_data, metrics=eval_metrics,
+                         similarities=similarities, model_name=model_name)
+    return len(user_stories)
+
+
+def run_case(mode, num_stories, num_engineers, args, model_name):
+    num_epics = max(1, num_stories // args.stories_per_epic)
+    prd_data = generate_prd(num_epics, args.stories_per_epic, args.words, seed=args.seed)
+    engineers = generate_roster(num_engineers, args.vocabulary, args.skills_per_engineer, seed=args.seed)
+    nlp_model = build_model(mode, model_name)
+
+    latencies = []
+    stage_walls = {}
+    for _ in range(args.repeats):
+        profiler.reset()
+        start = time.perf_counter()
+        stories = run_pipeline(mode, nlp_model, prd_data, engineers, model_name, args.eval_metrics)
+        latencies.append(time.perf_counter() - start)
+        for stage, total in profiler.summary().items():
+            stage_walls.setdefault(stage, []).append(total['wall_seconds'])
+
+    median_latency = statistics.median(latencies)
+    return {
+        'mode': mode,
+        'stories': stories,
+        'engineers': num_engineers,
+        'latency_seconds': {'median': median_latency, 'min': min(latencies), 'max': max(latencies)},
+        'throughput_stories_per_second': stories / median_latency if median_latency else None,
+        'stages_median_wall_seconds': {stage: statistics.median(walls) for stage, walls in sorted(stage_walls.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seeded latency/throughput benchmark for every pipeline mode')
+    parser.add_argument('--modes', type=str, default='basic,advanced,optimized')
+    parser.add_argument('--stories', type=str, default='50,200,1000', help='Comma-separated story counts')
+    parser.add_argument('--engineers', type=str, default='4,50,500', help='Comma-separated roster sizes')
+    parser.add_argument('--stories_per_epic', type=int, default=10)
+    parser.add_argument('--words', type=int, default=12, help='Words per generated requirement')
+    parser.add_argument('--vocabulary', type=int, default=26, help='Size of the skill vocabulary')
+    parser.add_argument('--skills_per_engineer', type=int, default=3)
+    parser.add_argument('--eval_metrics', type=str, choices=['workload', 'sampled', 'full'], default='full')
+    parser.add_argument('--encoder', type=str, choices=['stub', 'minilm'], default='stub',
+                        help='stub runs fully offline with a hashing encoder; minilm uses the real model')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default='benchmark_results.json')
+    args = parser.parse_args()
+
+    profiler.enable()
+    if args.encoder == 'stub':
+        model_name = STUB_MODEL_NAME
+        register_embedding_model(model_name, HashingEncoder())
+    else:
+        model_name = DEFAULT_MODEL_NAME
+
+    runs = []
+    for mode in args.modes.split(','):
+        for num_stories in (int(value) for value in args.stories.split(',')):
+            for num_engineers in (int(value) for value in args.engineers.split(',')):
+                runs.append(run_case(mode, num_stories, num_engineers, args, model_name))
+                print(f"{mode:>9} stories={runs[-1]['stories']:>6} engineers={num_engineers:>5} "
+                      f"median={runs[-1]['latency_seconds']['median']:.4f}s")
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'encoder': args.encoder,
+            'arguments': {key: value for key, value in vars(args).items() if key != 'output'},
+        },
+        'runs': runs,
+    }
+    with open(args.output, 'w') as out:
+        json.dump(results, out, indent=4, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from embeddings import register_embedding_model
+from service import ScoringService
+from synthetic import HashingEncoder, generate_prd, generate_roster
+
+STUB_MODEL_NAME = 'stub-hashing-encoder'
+
+
+async def call_asgi(app, path, payload):
+    body = json.dumps(payload).encode('utf-8')
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'headers': [(b'content-type', b'application/json')]}
+    response = {}
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+
+    await app(scope, receive, send)
+    return response['status']
+
+
+def call_http(url, path, payload):
+    request = urllib.request.Request(url.rstrip('/') + path, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+def build_payloads(args):
+    engineers = generate_roster(args.engineers, seed=args.seed)
+    payloads = []
+    for idx in range(args.distinct):
+        prd = generate_prd(max(1, args.stories // 5), 5, seed=args.seed + idx)
+        payloads.append({'prd': prd, 'engineers': engineers, 'mode': args.mode, 'metrics': args.eval_metrics})
+    return payloads
+
+
+async def run_in_process(args, payloads):
+    register_embedding_model(STUB_MODEL_NAME, HashingEncoder())
+    app = ScoringService(model_name=STUB_MODEL_NAME, workers=args.workers, max_queue=args.max_queue,
+                         warm_modes=(args.mode,))
+    app.warm()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = []
+
+    async def one(request_idx):
+        async with semaphore:
+            start = time.perf_counter()
+            status = await call_asgi(app, args.endpoint, payloads[request_idx % len(payloads)])
+            results.append((status, time.perf_counter() - start))
+
+    await asyncio.gather(*(one(idx) for idx in range(args.requests)))
+    return results, app.service_stats()
+
+
+def run_over_http(args, payloads):
+    def one(request_idx):
+        start = time.perf_counter()
+        status = call_http(args.url, args.endpoint, payloads[request_idx % len(payloads)])
+        return status, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(one, range(args.requests)))
+    with urllib.request.urlopen(args.url.rstrip('/') + '/stats') as response:
+        return results, json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency percentiles of the scoring service under concurrent load')
+    parser.add_argument('--url', type=str, default=None,
+                        help='Base URL of a running service.py; by default the app is driven in-process with a stub encoder')
+    parser.add_argument('--endpoint', type=str, default='/assign',
+                        choices=['/extract_sections', '/generate_stories', '/assign', '/evaluate'])
+    parser.add_argument('--mode', type=str, choices=['basic', 'advanced', 'optimized'], default='advanced')
+    parser.add_argument('--eval_metrics', type=str, default='workload')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--distinct', type=int, default=8,
+                        help='Number of distinct PRDs cycled through; fewer means more identical requests to coalesce')
+    parser.add_argument('--stories', type=int, default=100)
+    parser.add_argument('--engineers', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max_queue', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    payloads = build_payloads(args)
+    start = time.perf_counter()
+    if args.url:
+        results, service_stats = run_over_http(args, payloads)
+    else:
+        results, service_stats = asyncio.run(run_in_process(args, payloads))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for status, latency in results if status == 200])
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    print(json.dumps({
+        'endpoint': args.endpoint,
+        'mode': args.mode,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'statuses': statuses,
+        'throughput_requests_per_second': len(results) / elapsed,
+        'latency_seconds': {
+            'p50': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p99': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            'max': float(latencies.max()) if len(latencies) else None,
+        },
+        'service': {key: service_stats[key] for key in ('requests', 'coalesced', 'rejected', 'failed')},
+    }, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from embeddings import cosine_similarity_matrix
+from optimization import assignment_objective, engineer_capacities, greedy_workload_assignment, solve_capacitated_assignment
+from sharding import ShardedAssigner
+from story_generation import generate_story_plan
+from synthetic import generate_prd
+
+
+def clustered_similarities(num_tasks, num_engineers, dim, rng, num_topics=16):
+    # Stories and engineers drawn around shared topics, so epics and clusters carry real structure.
+    topics = rng.normal(size=(num_topics, dim)).astype(np.float32)
+    stories = topics[rng.integers(num_topics, size=num_tasks)] + 0.5 * rng.normal(size=(num_tasks, dim))
+    engineers = topics[rng.integers(num_topics, size=num_engineers)] + 0.5 * rng.normal(size=(num_engineers, dim))
+    return cosine_similarity_matrix(stories.astype(np.float32), engineers.astype(np.float32))
+
+
+def summarize(similarities, chosen, seconds, num_engineers):
+    return {
+        'objective': assignment_objective(similarities, chosen),
+        'max_load': int(np.bincount(chosen, minlength=num_engineers).max()),
+        'seconds': seconds,
+    }
+
+
+def run_case(num_epics, stories_per_epic, num_engineers, dim, processes, seed):
+    rng = np.random.default_rng(seed)
+    plan = generate_story_plan(generate_prd(num_epics, stories_per_epic, seed=seed), dedupe='none')
+    stories = plan.user_stories
+    engineers = [{'name': f'Engineer {idx}'} for idx in range(num_engineers)]
+    similarities = clustered_similarities(len(stories), num_engineers, dim, rng)
+    capacities = engineer_capacities(engineers, len(stories))
+
+    start = time.perf_counter()
+    greedy, _ = greedy_workload_assignment(similarities)
+    result = {'stories': len(stories), 'engineers': num_engineers,
+              'greedy': summarize(similarities, greedy, time.perf_counter() - start, num_engineers)}
+    start = time.perf_counter()
+    solved = solve_capacitated_assignment(similarities, capacities)
+    result['capacitated_lap'] = summarize(similarities, solved, time.perf_counter() - start, num_engineers)
+
+    for shard_by in ('epic', 'cluster'):
+        for solver in ('greedy', 'lap'):
+            runs = {}
+            for count in processes:
+                with ShardedAssigner(shard_by, num_shards=num_epics, processes=count, seed=seed) as sharder:
+                    start = time.perf_counter()
+                    table = sharder.assign(stories, engineers, similarities, solver=solver, story_plan=plan)
+                    runs[count] = (table.engineer_indices, time.perf_counter() - start)
+            chosen = runs[processes[0]][0]
+            result[f'sharded_{shard_by}_{solver}'] = {
+                **summarize(similarities, chosen, runs[processes[0]][1], num_engineers),
+                'seconds_by_processes': {count: seconds for count, (_, seconds) in runs.items()},
+                'deterministic': all(np.array_equal(chosen, other) for other, _ in runs.values()),
+            }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded assignment against whole-PRD greedy and capacitated LAP')
+    parser.add_argument('--sizes', type=str, default='8x125x50,16x250x200',
+                        help='Comma-separated EPICSxSTORIES_PER_EPICxENGINEERS cases')
+    parser.add_argument('--processes', type=str, default='1,4',
+                        help='Comma-separated process counts; results must match across all of them')
+    parser.add_argument('--dim', type=int, default=64, help='Embedding dimension of the synthetic vectors')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    processes = [int(count) for count in args.processes.split(',')]
+    results = []
+    for case in args.sizes.split(','):
+        num_epics, stories_per_epic, num_engineers = (int(value) for value in case.lower().split('x'))
+        results.append(run_case(num_epics, stories_per_epic, num_engineers, args.dim, processes, args.seed))
+    print(json.dumps(results, indent=4))
+    if not all(case[key]['deterministic'] for case in results for key in case if key.startswith('sharded_')):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'main.py')
+
+# Modules that only the code paths needing them may import; none belongs in --help or a basic run.
+HEAVY_MODULES = ('torch', 'sentence_transformers', 'transformers', 'sklearn', 'scipy', 'pandas', 'matplotlib',
+                 'nltk', 'rouge_score', 'streamlit')
+
+
+def parse_importtime(stderr):
+    # Top-level entries of `python -X importtime`, minus interpreter startup (`site` and what it pulls in).
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        if not name[1:].startswith(' ') and module != 'site':
+            imports[module] = int(cumulative) / 1e6
+        imports.setdefault('_all', set()).add(module.split('.')[0])
+    return imports
+
+
+def measure(args, repeats, cwd):
+    seconds = []
+    imports = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=cwd, capture_output=True, text=True)
+        seconds.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} exited with {result.returncode}:\n{result.stderr[-2000:]}")
+        imports = parse_importtime(result.stderr)
+    loaded = imports.pop('_all')
+    slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'median_wall_seconds': statistics.median(seconds),
+        'import_seconds': sum(imports.values()),
+        'slowest_imports': dict(slowest),
+        'heavy_modules': sorted(module for module in HEAVY_MODULES if module in loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup import-time budget for main.py --help and basic mode')
+    parser.add_argument('--help_budget', type=float, default=0.4, help='Import-time budget in seconds for --help')
+    parser.add_argument('--basic_budget', type=float, default=0.6,
+                        help='Import-time budget in seconds for a basic-mode run with workload metrics and JSON export')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--prd_file', type=str, default=os.path.join(ROOT, 'data', 'prd_data.json'))
+    parser.add_argument('--engineers', type=str, default=os.path.join(ROOT, 'data', 'enineer_profile.json'))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        cases = {
+            'help': ([MAIN, '--help'], args.help_budget),
+            'basic': ([MAIN, '--mode', 'basic', '--prd_file', args.prd_file, '--engineers', args.engineers,
+                       '--eval_metrics', 'workload', '--export_formats', 'json', '--output_dir', output_dir],
+                      args.basic_budget),
+        }
+        results = {}
+        for name, (command, budget) in cases.items():
+            # Run from the scratch directory so pipeline.log is not written into the repository.
+            result = measure(command, args.repeats, output_dir)
+            result['budget_seconds'] = budget
+            result['within_budget'] = result['import_seconds'] <= budget and not result['heavy_modules']
+            results[name] = result
+
+    print(json.dumps(results, indent=4))
+    if not all(result['within_budget'] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import hashlib
+import re
+
+import numpy as np
+
+SKILL_WORDS = [
+    'React', 'Angular', 'Frontend', 'Python', 'Django', 'Backend', 'Node.js', 'MongoDB', 'Fullstack',
+    'TensorFlow', 'PyTorch', 'Machine Learning', 'Kubernetes', 'Terraform', 'PostgreSQL', 'Kafka',
+    'Spark', 'Go', 'Rust', 'Java', 'Kotlin', 'Swift', 'GraphQL', 'Redis', 'CI/CD', 'Security',
+]
+ROLES = ['Front-end Engineer', 'Back-end Engineer', 'Full-stack Engineer', 'ML Engineer', 'Platform Engineer',
+         'Data Engineer', 'Mobile Engineer', 'Security Engineer']
+REQUIREMENT_WORDS = [
+    'displays', 'tracks', 'compares', 'generates', 'highlights', 'recommends', 'supports', 'exports',
+    'dashboard', 'metrics', 'sprint', 'pipeline', 'deployment', 'alerts', 'anomalies', 'teams', 'reports',
+    'latency', 'trend', 'visualization', 'insights', 'workflow', 'integration', 'permissions', 'audit',
+    'model', 'forecast', 'backlog', 'release', 'incident', 'review', 'api', 'mobile', 'search',
+]
+
+
+def generate_prd(num_epics, requirements_per_epic, words_per_requirement=12, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = REQUIREMENT_WORDS + [skill.lower() for skill in SKILL_WORDS]
+
+    def sentence(length):
+        words = rng.choice(vocabulary, size=length)
+        return ' '.join(words).capitalize() + '.'
+
+    return {
+        'product_name': f'Synthetic Product {seed}',
+        'objectives': [sentence(words_per_requirement) for _ in range(3)],
+        'user_personas': [f'Persona {idx}: {sentence(words_per_requirement)}' for idx in range(3)],
+        'functional_requirements': {
+            f'Epic {epic_idx} {rng.choice(REQUIREMENT_WORDS).title()}': [
+                sentence(words_per_requirement) for _ in range(requirements_per_epic)
+            ]
+            for epic_idx in range(num_epics)
+        },
+    }
+
+
+def generate_roster(num_engineers, vocabulary_size=len(SKILL_WORDS), skills_per_engineer=3, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = SKILL_WORDS + [f'Skill{idx}' for idx in range(max(0, vocabulary_size - len(SKILL_WORDS)))]
+    vocabulary = vocabulary[:vocabulary_size]
+    return [{
+        'name': f'Engineer {idx}',
+        'role': str(rng.choice(ROLES)),
+        'skills': ', '.join(rng.choice(vocabulary, size=min(skills_per_engineer, len(vocabulary)), replace=False)),
+    } for idx in range(num_engineers)]
+
+
+class HashingEncoder:
+    # Deterministic feature-hashing stand-in for MiniLM: no weights, no network, same interface.
+    def __init__(self, dimension=384):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r'\w+', text.lower()):
+                digest = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+                vectors[row, digest % self.dimension] += 1.0 if (digest >> 63) else -1.0
+        return vectors
@@ -0,0 +1,210 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from embeddings import DEFAULT_MODEL_NAME
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+KEY_BYTES = 16
+
+
+# Vectors live in an append-only float32 file that is memory-mapped for reads; the key
+# index and LRU timestamps are replaced atomically next to it, so concurrent readers
+# always see a consistent snapshot and only writers take the file lock.
+class EmbeddingCache:
+    def __init__(self, cache_dir, model_name=DEFAULT_MODEL_NAME, max_entries=200000, max_bytes=None):
+        self.model_name = model_name
+        self.directory = os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        self._index_path = os.path.join(self.directory, 'index.npz')
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def key(self, text):
+        return hashlib.blake2b(f"{self.model_name}\0{text}".encode('utf-8'), digest_size=KEY_BYTES).digest()
+
+    def encode(self, texts, encode_fn):
+        texts = list(texts)
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            rows, stored = self._lookup(keys)
+            hit_mask = rows >= 0
+            hit_count = int(hit_mask.sum())
+            self.hits += hit_count
+            self.misses += len(texts) - hit_count
+
+            vectors = None
+            if hit_count:
+                self._last_used[rows[hit_mask]] = time.time()
+                vectors = np.empty((len(texts), stored.shape[1]), dtype=np.float32)
+                vectors[hit_mask] = stored[rows[hit_mask]]
+
+        missing = {}
+        for position in np.flatnonzero(~hit_mask):
+            missing.setdefault(keys[position], []).append(position)
+        if missing:
+            # Encode without holding the lock so concurrent callers reach the scheduler together.
+            missing_keys = list(missing)
+            new_vectors = np.asarray(encode_fn([texts[missing[key][0]] for key in missing_keys]),
+                                     dtype=np.float32)
+            if vectors is None:
+                vectors = np.empty((len(texts), new_vectors.shape[1]), dtype=np.float32)
+            for key, vector in zip(missing_keys, new_vectors):
+                vectors[missing[key]] = vector
+            with self._lock:
+                self._store(missing_keys, new_vectors)
+
+        if vectors is None:
+            return np.empty((0, self._dim), dtype=np.float32)
+        logging.info("Embedding cache %s: %d hits, %d misses", self.model_name, hit_count, len(texts) - hit_count)
+        return vectors
+
+    def flush(self):
+        with self._lock, self._file_lock():
+            self._refresh()
+            self._write_index()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._rows),
+        }
+
+    def _load_index(self):
+        self._keys = np.empty((0, KEY_BYTES), dtype=np.uint8)
+        self._last_used = np.empty(0, dtype=np.float64)
+        self._generation = 0
+        self._dim = 0
+        self._index_mtime = None
+        if os.path.exists(self._index_path):
+            self._index_mtime = os.stat(self._index_path).st_mtime_ns
+            with np.load(self._index_path) as index:
+                self._keys = index['keys']
+                self._last_used = index['last_used'].copy()
+                self._generation = int(index['generation'])
+                self._dim = int(index['dim'])
+        self._rows = {key.tobytes(): row for row, key in enumerate(self._keys)}
+        self._vectors = None
+
+    def _refresh(self):
+        # Pick up rows written by other processes while keeping our own LRU timestamps.
+        if not os.path.exists(self._index_path) or os.stat(self._index_path).st_mtime_ns == self._index_mtime:
+            return
+        local_last_used = {key: self._last_used[row] for key, row in self._rows.items()}
+        self._load_index()
+        for key, row in self._rows.items():
+            if key in local_last_used:
+                self._last_used[row] = max(self._last_used[row], local_last_used[key])
+
+    def _vectors_path(self, generation):
+        return os.path.join(self.directory, f'vectors-{generation}.f32')
+
+    def _open_vectors(self):
+        if self._vectors is None:
+            self._vectors = np.memmap(self._vectors_path(self._generation), dtype=np.float32, mode='r',
+                                      shape=(len(self._keys), self._dim))
+        return self._vectors
+
+    def _lookup(self, keys):
+        # Rows and the vectors they index must come from the same index snapshot. If another
+        # process compacted the cache after we read the index, reload it and look the keys up
+        # again, so entries it evicted become misses instead of reading another generation's rows.
+        while True:
+            rows = np.array([self._rows.get(key, -1) for key in keys], dtype=np.int64)
+            if not (rows >= 0).any():
+                return rows, None
+            try:
+                return rows, self._open_vectors()
+            except FileNotFoundError:
+                generation = self._generation
+                self._load_index()
+                if self._generation == generation:
+                    raise
+
+    def _store(self, keys, vectors):
+        with self._file_lock():
+            self._refresh()
+            if not self._dim:
+                self._dim = vectors.shape[1]
+            fresh = [idx for idx, key in enumerate(keys) if key not in self._rows]
+            if fresh:
+                path = self._vectors_path(self._generation)
+                offset = len(self._keys) * self._dim * 4
+                with open(path, 'r+b' if os.path.exists(path) else 'wb') as vector_file:
+                    # Seek rather than append so rows left by a crashed writer are overwritten.
+                    vector_file.seek(offset)
+                    vector_file.write(np.ascontiguousarray(vectors[fresh]).tobytes())
+                    vector_file.truncate()
+                new_keys = np.frombuffer(b''.join(keys[idx] for idx in fresh), dtype=np.uint8).reshape(-1, KEY_BYTES)
+                for idx in fresh:
+                    self._rows[keys[idx]] = len(self._rows)
+                self._keys = np.concatenate([self._keys, new_keys])
+                self._last_used = np.concatenate([self._last_used, np.full(len(fresh), time.time())])
+                self._vectors = None
+                self._evict_if_needed()
+            self._write_index()
+
+    def _capacity(self):
+        capacity = self.max_entries
+        if self.max_bytes is not None and self._dim:
+            capacity = min(capacity, self.max_bytes // (self._dim * 4))
+        return capacity
+
+    def _evict_if_needed(self):
+        capacity = self._capacity()
+        if len(self._keys) <= capacity:
+            return
+        # Compact down to 90% of capacity so the next few stores do not trigger another rewrite.
+        keep = np.sort(np.argsort(-self._last_used, kind='stable')[:int(capacity * 0.9)])
+        old_path = self._vectors_path(self._generation)
+        retained = np.array(self._open_vectors()[keep], dtype=np.float32)
+        self._generation += 1
+        with open(self._vectors_path(self._generation), 'wb') as vector_file:
+            vector_file.write(retained.tobytes())
+        self.evictions += len(self._keys) - len(keep)
+        self._keys = self._keys[keep]
+        self._last_used = self._last_used[keep]
+        self._rows = {key.tobytes(): row for row, key in enumerate(self._keys)}
+        self._vectors = None
+        self._write_index()
+        os.remove(old_path)
+        logging.info("Embedding cache %s compacted to %d entries", self.model_name, len(self._keys))
+
+    def _write_index(self):
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as index_file:
+            np.savez(index_file, keys=self._keys, last_used=self._last_used,
+                     generation=self._generation, dim=self._dim)
+        os.replace(tmp_path, self._index_path)
+        self._index_mtime = os.stat(self._index_path).st_mtime_ns
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
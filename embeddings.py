@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from encode_scheduler import EncodeScheduler
+from profiling import profiler
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_BACKENDS = ('torch', 'int8', 'onnx')
+
+_models = {}
+_load_metrics = {}
+_schedulers = {}
+_scheduler_config = {'batch_size': 64, 'max_wait_seconds': 0.005}
+_backend_config = {'backend': 'torch', 'model_dir': None}
+_registry_lock = threading.Lock()
+
+
+def load_embedding_backend(model_name=DEFAULT_MODEL_NAME, device=None, backend='torch', model_dir=None):
+    # With `model_dir` the weights are read from that directory only and nothing is downloaded.
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+    from sentence_transformers import SentenceTransformer
+
+    source = model_dir or model_name
+    if backend == 'onnx':
+        # Requires onnxruntime and optimum; uses onnx/model.onnx from the model directory.
+        return SentenceTransformer(source, device=device, backend='onnx', local_files_only=model_dir is not None)
+    model = SentenceTransformer(source, device=device, local_files_only=model_dir is not None)
+    if backend == 'int8':
+        import torch
+
+        # Dynamic quantization: int8 weights for every Linear layer, activations quantized per batch on CPU.
+        model = torch.ao.quantization.quantize_dynamic(model.to('cpu'), {torch.nn.Linear}, dtype=torch.qint8,
+                                                       inplace=True)
+    return model
+
+
+def configure_embedding_backend(backend='torch', model_dir=None):
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+    with _registry_lock:
+        _backend_config['backend'] = backend
+        _backend_config['model_dir'] = model_dir
+
+
+def embedding_namespace(model_name=DEFAULT_MODEL_NAME):
+    # Quantized backends produce slightly different vectors, and --model_dir can load any local
+    # model under the default name, so caches keep each backend and model directory apart.
+    backend = _backend_config['backend']
+    namespace = model_name if backend == 'torch' else f"{model_name}-{backend}"
+    model_dir = _backend_config['model_dir']
+    if model_dir:
+        digest = hashlib.blake2b(os.path.realpath(model_dir).encode('utf-8'), digest_size=6).hexdigest()
+        namespace = f"{namespace}-{digest}"
+    return namespace
+
+
+def get_embedding_model(model_name=DEFAULT_MODEL_NAME, device=None):
+    key = (model_name, device)
+    model = _models.get(key)
+    if model is None:
+        with _registry_lock:
+            model = _models.get(key)
+            if model is None:
+                start_wall = time.perf_counter()
+                start_cpu = time.process_time()
+                with profiler.stage('model_load'):
+                    model = load_embedding_backend(model_name, device, **_backend_config)
+                _models[key] = model
+                _load_metrics[key] = {
+                    'backend': _backend_config['backend'],
+                    'loads': 1,
+                    'hits': 0,
+                    'load_wall_seconds': time.perf_counter() - start_wall,
+                    'load_cpu_seconds': time.process_time() - start_cpu,
+                }
+                logging.info("Loaded embedding model %s (%s backend) on %s in %.2fs", model_name,
+                             _backend_config['backend'], device or 'default device',
+                             _load_metrics[key]['load_wall_seconds'])
+                return model
+    _load_metrics[key]['hits'] += 1
+    return model
+
+
+def register_embedding_model(model_name, model, device=None):
+    # Lets benchmarks and offline runs plug in any object exposing encode() and
+    # get_sentence_embedding_dimension() under a model name.
+    with _registry_lock:
+        _models[(model_name, device)] = model
+        _load_metrics[(model_name, device)] = {'loads': 0, 'hits': 0, 'load_wall_seconds': 0.0, 'load_cpu_seconds': 0.0}
+        _schedulers.pop((model_name, device), None)
+
+
+def configure_encode_scheduler(batch_size=None, max_wait_seconds=None):
+    with _registry_lock:
+        if batch_size is not None:
+            _scheduler_config['batch_size'] = batch_size
+        if max_wait_seconds is not None:
+            _scheduler_config['max_wait_seconds'] = max_wait_seconds
+        for scheduler in _schedulers.values():
+            scheduler.batch_size = _scheduler_config['batch_size']
+            scheduler.max_wait_seconds = _scheduler_config['max_wait_seconds']
+
+
+def get_encode_scheduler(model_name=DEFAULT_MODEL_NAME, device=None):
+    key = (model_name, device)
+    scheduler = _schedulers.get(key)
+    if scheduler is None:
+        model = get_embedding_model(model_name, device)
+        with _registry_lock:
+            scheduler = _schedulers.get(key)
+            if scheduler is None:
+                scheduler = EncodeScheduler(
+                    lambda batch: model.encode(batch, batch_size=max(len(batch), 1), convert_to_numpy=True),
+                    **_scheduler_config)
+                _schedulers[key] = scheduler
+    return scheduler
+
+
+def encode_texts(texts, model_name=DEFAULT_MODEL_NAME, device=None, cache=None):
+    texts = list(texts)
+    if not texts:
+        dimension = get_embedding_model(model_name, device).get_sentence_embedding_dimension()
+        return np.empty((0, dimension), dtype=np.float32)
+    scheduler = get_encode_scheduler(model_name, device)
+    with profiler.stage('encode', len(texts)):
+        if cache is None:
+            return scheduler.encode(texts)
+        return cache.encode(texts, scheduler.encode)
+
+
+def normalize_embeddings(embeddings):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def cosine_similarity_matrix(a, b):
+    return normalize_embeddings(a) @ normalize_embeddings(b).T
+
+
+def get_load_metrics():
+    return {f"{name}@{device or 'default'}": dict(metrics)
+            for (name, device), metrics in _load_metrics.items()}
+
+
+def get_scheduler_stats():
+    return {f"{name}@{device or 'default'}": scheduler.stats()
+            for (name, device), scheduler in _schedulers.items()}
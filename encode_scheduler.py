@@ -0,0 +1,95 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+# Coalesces encode requests from every pipeline stage and thread into shared forward passes.
+# Texts are deduplicated across requests and sorted by length before chunking, so each
+# batch pads to a similar sequence length; every caller gets back only its own rows.
+class EncodeScheduler:
+    def __init__(self, encode_fn, batch_size=64, max_wait_seconds=0.005):
+        self.encode_fn = encode_fn
+        self.batch_size = batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.batches = 0
+        self.requests = 0
+        self.texts_requested = 0
+        self.texts_encoded = 0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def encode(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.asarray(self.encode_fn([]), dtype=np.float32)
+        future = Future()
+        self._queue.put((texts, future))
+        self._ensure_worker()
+        return future.result()
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'texts_requested': self.texts_requested,
+            'texts_encoded': self.texts_encoded,
+            'avg_batch_size': self.texts_encoded / self.batches if self.batches else 0.0,
+        }
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='encode-scheduler', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            pending_texts = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait_seconds
+            while pending_texts < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(request)
+                pending_texts += len(request[0])
+            self._process(pending)
+
+    def _process(self, pending):
+        unique = {}
+        for texts, _ in pending:
+            for text in texts:
+                unique.setdefault(text, len(unique))
+        ordered = sorted(unique, key=len)
+
+        try:
+            vectors = None
+            for start in range(0, len(ordered), self.batch_size):
+                chunk = ordered[start:start + self.batch_size]
+                chunk_vectors = np.asarray(self.encode_fn(chunk), dtype=np.float32)
+                if vectors is None:
+                    vectors = np.empty((len(unique), chunk_vectors.shape[1]), dtype=np.float32)
+                vectors[[unique[text] for text in chunk]] = chunk_vectors
+                self.batches += 1
+        except Exception as exc:
+            logging.exception("Encode batch of %d texts failed", len(ordered))
+            for _, future in pending:
+                future.set_exception(exc)
+            return
+
+        self.requests += len(pending)
+        self.texts_requested += sum(len(texts) for texts, _ in pending)
+        self.texts_encoded += len(ordered)
+        for texts, future in pending:
+            future.set_result(vectors[[unique[text] for text in texts]])
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+from embeddings import normalize_embeddings
+from exporters import atomic_write
+
+
+def profile_fingerprint(engineer):
+    return hashlib.sha1(engineer['skills'].encode('utf-8')).hexdigest()
+
+
+# Clustered (IVF-style) index over normalized engineer skill embeddings. Each story only
+# scores the engineers in its `nprobe` closest clusters; nprobe is the recall/latency knob
+# and nprobe >= num_clusters degenerates to an exact scan.
+class EngineerIndex:
+    def __init__(self, nprobe=8, num_clusters=None, iterations=10, seed=0):
+        self.nprobe = nprobe
+        self.num_clusters = num_clusters
+        self.iterations = iterations
+        self.seed = seed
+        self.names = []
+        self.fingerprints = []
+        self.embeddings = np.empty((0, 0), dtype=np.float32)
+        self.cluster_of = np.empty(0, dtype=np.int64)
+        self.active = np.empty(0, dtype=bool)
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.built_size = 0
+        self._positions = {}
+        self._members = None
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def sync(self, engineers, encode_fn):
+        # Re-encode only profiles whose skills text changed and drop engineers no longer on the roster.
+        current = {eng['name'] for eng in engineers}
+        for name in [name for name in self._positions if name not in current]:
+            self.remove(name)
+        stale = [eng for eng in engineers
+                 if eng['name'] not in self._positions
+                 or not self.active[self._positions[eng['name']]]
+                 or self.fingerprints[self._positions[eng['name']]] != profile_fingerprint(eng)]
+        if stale:
+            self.upsert([eng['name'] for eng in stale], encode_fn([eng['skills'] for eng in stale]),
+                        [profile_fingerprint(eng) for eng in stale])
+        if self.built_size == 0 or len(self) > 2 * self.built_size:
+            self.rebuild()
+        logging.info("Engineer index synced: %d profiles, %d re-encoded", len(self), len(stale))
+
+    def upsert(self, names, vectors, fingerprints=None):
+        vectors = normalize_embeddings(vectors)
+        fingerprints = fingerprints or [''] * len(names)
+        if self.embeddings.size == 0:
+            self.embeddings = np.empty((0, vectors.shape[1]), dtype=np.float32)
+
+        positions = []
+        new_rows = []
+        for row, (name, fingerprint) in enumerate(zip(names, fingerprints)):
+            position = self._positions.get(name)
+            if position is None:
+                position = len(self.names)
+                self._positions[name] = position
+                self.names.append(name)
+                self.fingerprints.append(fingerprint)
+                new_rows.append(row)
+            else:
+                self.fingerprints[position] = fingerprint
+            positions.append(position)
+
+        if new_rows:
+            self.embeddings = np.vstack([self.embeddings, np.zeros((len(new_rows), vectors.shape[1]), dtype=np.float32)])
+            self.cluster_of = np.concatenate([self.cluster_of, np.zeros(len(new_rows), dtype=np.int64)])
+            self.active = np.concatenate([self.active, np.zeros(len(new_rows), dtype=bool)])
+        positions = np.array(positions, dtype=np.int64)
+        self.embeddings[positions] = vectors
+        self.active[positions] = True
+        if len(self.centroids):
+            self.cluster_of[positions] = np.argmax(vectors @ self.centroids.T, axis=1)
+        self._members = None
+
+    def remove(self, name):
+        position = self._positions.get(name)
+        if position is not None:
+            self.active[position] = False
+            self._members = None
+
+    def rebuild(self):
+        live = np.flatnonzero(self.active)
+        if not len(live):
+            return
+        num_clusters = self.num_clusters or max(1, int(np.sqrt(len(live))))
+        num_clusters = min(num_clusters, len(live))
+        rng = np.random.default_rng(self.seed)
+        data = self.embeddings[live]
+        centroids = data[rng.choice(len(live), num_clusters, replace=False)]
+        # Spherical k-means: assign by cosine, re-center on the normalized mean.
+        for _ in range(self.iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            for cluster in range(num_clusters):
+                members = data[labels == cluster]
+                if len(members):
+                    centroids[cluster] = normalize_embeddings(members.mean(axis=0))
+        self.centroids = centroids.astype(np.float32)
+        self.cluster_of[live] = np.argmax(data @ self.centroids.T, axis=1)
+        self.built_size = len(live)
+        self._members = None
+
+    def members(self):
+        if self._members is None:
+            live = np.flatnonzero(self.active)
+            order = live[np.argsort(self.cluster_of[live], kind='stable')]
+            bounds = np.searchsorted(self.cluster_of[order], np.arange(len(self.centroids) + 1))
+            self._members = [order[bounds[idx]:bounds[idx + 1]] for idx in range(len(self.centroids))]
+        return self._members
+
+    def search(self, queries, k, nprobe=None):
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        queries = normalize_embeddings(queries)
+        k = min(k, len(self))
+        candidates = np.empty((len(queries), k), dtype=np.int64)
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        members = self.members()
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :nprobe]
+
+        for row, query in enumerate(queries):
+            pool = np.concatenate([members[cluster] for cluster in probes[row]])
+            if len(pool) < k:
+                # Widen to the next-closest clusters when the probed ones hold fewer than k engineers.
+                order = np.argsort(-(self.centroids @ query))
+                extra = nprobe
+                while len(pool) < k and extra < len(order):
+                    pool = np.concatenate([pool, members[order[extra]]])
+                    extra += 1
+            pool_scores = self.embeddings[pool] @ query
+            top = np.argpartition(-pool_scores, k - 1)[:k] if len(pool) > k else np.arange(len(pool))
+            top = top[np.argsort(-pool_scores[top], kind='stable')]
+            candidates[row] = pool[top]
+            scores[row] = pool_scores[top]
+        return candidates, scores
+
+    def positions_for(self, engineers):
+        # Map index rows to positions in the caller's roster list.
+        roster_position = {eng['name']: idx for idx, eng in enumerate(engineers)}
+        return np.array([roster_position.get(name, -1) for name in self.names], dtype=np.int64)
+
+    def save(self, path):
+        atomic_write(path, lambda out: np.savez(
+            out, names=np.array(self.names), fingerprints=np.array(self.fingerprints), embeddings=self.embeddings,
+            cluster_of=self.cluster_of, active=self.active, centroids=self.centroids, built_size=self.built_size,
+            nprobe=self.nprobe, seed=self.seed), binary=True)
+
+    @classmethod
+    def load(cls, path, nprobe=None):
+        with np.load(path) as state:
+            index = cls(nprobe=nprobe or int(state['nprobe']), seed=int(state['seed']))
+            index.names = state['names'].tolist()
+            index.fingerprints = state['fingerprints'].tolist()
+            index.embeddings = state['embeddings']
+            index.cluster_of = state['cluster_of']
+            index.active = state['active']
+            index.centroids = state['centroids']
+            index.built_size = int(state['built_size'])
+        index._positions = {name: position for position, name in enumerate(index.names)}
+        return index
+
+    @classmethod
+    def open(cls, path, nprobe=8):
+        if path and os.path.exists(path):
+            return cls.load(path, nprobe)
+        return cls(nprobe=nprobe)
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from assignment_table import assignment_columns
+from profiling import profiler
+
+DEFAULT_EXPORT_FORMATS = ('json', 'xlsx', 'eda')
+# mkstemp creates files as 0600; read the umask once, at import, since os.umask can only be read by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write(path, write_fn, binary=False):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as tmp_file:
+            write_fn(tmp_file)
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+def export_json(file_prefix, epics, user_stories, assignments, story_plan=None, **_):
+    output_data = {
+        'epics': epics,
+        'user_stories': user_stories,
+        'assignments': list(zip(*assignment_columns(assignments)))
+    }
+    if story_plan is not None:
+        output_data['story_ids'] = story_plan.story_ids
+        output_data['epic_stories'] = story_plan.epic_stories()
+    return [atomic_write(f"{file_prefix}.json", lambda out: json.dump(output_data, out, indent=4))]
+
+
+def export_jsonl(file_prefix, epics, user_stories, assignments, **_):
+    # One compact record per assignment, written as the list is walked.
+    def write(out):
+        for story, engineer in zip(*assignment_columns(assignments)):
+            out.write(json.dumps({'user_story': story, 'engineer': engineer}, separators=(',', ':')))
+            out.write('\n')
+
+    return [atomic_write(f"{file_prefix}.assignments.jsonl", write)]
+
+
+def assignments_frame(assignments):
+    import pandas as pd
+
+    story_texts, engineer_names = assignment_columns(assignments)
+    return pd.DataFrame({'User Story': story_texts, 'Assigned Engineer': engineer_names})
+
+
+def export_parquet(file_prefix, epics, user_stories, assignments, **_):
+    df_assignments = assignments_frame(assignments)
+    return [atomic_write(f"{file_prefix}.assignments.parquet", lambda out: df_assignments.to_parquet(out, index=False),
+                         binary=True)]
+
+
+def export_xlsx(file_prefix, epics, user_stories, assignments, **_):
+    import pandas as pd
+
+    df_epics = pd.DataFrame(epics, columns=['Epics'])
+    df_stories = pd.DataFrame(user_stories, columns=['User Stories'])
+    df_assignments = assignments_frame(assignments)
+
+    def write(out):
+        with pd.ExcelWriter(out, engine='xlsxwriter') as writer:
+            df_epics.to_excel(writer, sheet_name='Epics', index=False)
+            df_stories.to_excel(writer, sheet_name='User Stories', index=False)
+            df_assignments.to_excel(writer, sheet_name='Assignments', index=False)
+
+    return [atomic_write(f"{file_prefix}.xlsx", write, binary=True)]
+
+
+def build_eda_figures(prd_data, engineers):
+    # Plain Figure objects are never registered with pyplot, so they need no GUI backend
+    # and are freed as soon as the caller drops them.
+    from matplotlib.figure import Figure
+
+    product_name = prd_data.get('product_name', 'N/A')
+    objectives = len(prd_data.get('objectives', []))
+    functional_areas = len(prd_data.get('functional_requirements', {}))
+    roles = [eng['role'] for eng in engineers]
+
+    overview = Figure(figsize=(10, 6))
+    ax = overview.subplots()
+    ax.bar(['Objectives', 'Functional Areas'], [objectives, functional_areas], color='purple')
+    ax.set_title(f'PRD Overview for {product_name}')
+    ax.set_xlabel('Categories')
+    ax.set_ylabel('Count')
+
+    roles_figure = Figure(figsize=(10, 6))
+    ax = roles_figure.subplots()
+    ax.barh(roles, range(1, len(roles) + 1), color='green')
+    ax.set_title('Engineer Roles Distribution')
+    ax.set_xlabel('Role')
+    ax.set_ylabel('Count')
+
+    return {'eda_prd_overview.png': overview, 'eda_engineer_roles.png': roles_figure}
+
+
+def save_figures(figures, path_for_name):
+    paths = []
+    for file_name, figure in figures.items():
+        path = path_for_name(file_name)
+        paths.append(atomic_write(path, lambda out: figure.savefig(out, format='png'), binary=True))
+        figure.clear()
+        logging.info("Saved EDA plot as %s", path)
+    return paths
+
+
+def export_eda(file_prefix, prd_data=None, engineers=None, **_):
+    if prd_data is None or engineers is None:
+        return []
+    return save_figures(build_eda_figures(prd_data, engineers), lambda file_name: f"{file_prefix}_{file_name}")
+
+
+EXPORTERS = {
+    'json': export_json,
+    'jsonl': export_jsonl,
+    'parquet': export_parquet,
+    'xlsx': export_xlsx,
+    'eda': export_eda,
+}
+
+
+def run_exports(file_prefix, formats, epics, user_stories, assignments, prd_data=None, engineers=None, story_plan=None):
+    paths = []
+    for export_format in formats:
+        stage = 'perform_eda' if export_format == 'eda' else f'save_output.{export_format}'
+        with profiler.stage(stage, len(assignments)):
+            paths.extend(EXPORTERS[export_format](file_prefix, epics=epics, user_stories=user_stories,
+                                                  assignments=assignments, prd_data=prd_data, engineers=engineers,
+                                                  story_plan=story_plan))
+    return paths
+
+
+class ExportManager:
+    def __init__(self, output_dir='.', formats=DEFAULT_EXPORT_FORMATS, max_workers=2):
+        unknown = [export_format for export_format in formats if export_format not in EXPORTERS]
+        if unknown:
+            raise ValueError(f"Unknown export formats {unknown}, expected some of {sorted(EXPORTERS)}")
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export')
+        self._pending = []
+        self.written = 0
+        self.failed = []
+
+    def submit(self, name, epics, user_stories, assignments, prd_data=None, engineers=None, story_plan=None):
+        # Reap finished exports first so long batches do not keep every payload alive.
+        self._collect(wait=False)
+        file_prefix = os.path.join(self.output_dir, name)
+        future = self._executor.submit(run_exports, file_prefix, self.formats, epics, user_stories, assignments,
+                                       prd_data, engineers, story_plan)
+        self._pending.append((name, future))
+        return future
+
+    def close(self):
+        self._collect(wait=True)
+        self._executor.shutdown()
+        logging.info("Exports finished: %d files written, %d failed", self.written, len(self.failed))
+        return self.failed
+
+    def _collect(self, wait):
+        still_pending = []
+        for name, future in self._pending:
+            if not wait and not future.done():
+                still_pending.append((name, future))
+                continue
+            try:
+                self.written += len(future.result())
+            except Exception:
+                logging.exception("Export of %s failed", name)
+                self.failed.append(name)
+        self._pending = still_pending
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from assignment_table import AssignmentTable
+from embeddings import embedding_namespace
+from exporters import atomic_write
+from optimization import engineer_capacities, greedy_workload_assignment, solve_capacitated_assignment
+from story_generation import generate_story_plan
+
+
+def fingerprint(*parts):
+    return hashlib.sha1('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+def roster_fingerprint(engineers):
+    return fingerprint(*(json.dumps(eng, sort_keys=True) for eng in engineers))
+
+
+def load_state(state_path, roster, namespace):
+    if not os.path.exists(state_path):
+        return None
+    with np.load(state_path) as state:
+        if str(state['roster']) != roster:
+            logging.info("Engineer roster changed since %s was written; reprocessing every story", state_path)
+            return None
+        # Scores from another backend or model directory are not comparable (see embedding_namespace).
+        if 'namespace' not in state.files or str(state['namespace']) != namespace:
+            logging.info("Embedding model changed since %s was written; reprocessing every story", state_path)
+            return None
+        return {
+            'keys': state['keys'].tolist(),
+            'chosen': state['chosen'],
+            'similarities': state['similarities'],
+        }
+
+
+def save_state(state_path, roster, namespace, keys, chosen, similarities):
+    atomic_write(state_path, lambda out: np.savez(out, roster=roster, namespace=namespace, keys=np.array(keys),
+                                                  chosen=chosen, similarities=similarities), binary=True)
+
+
+def incremental_assign(sections, engineers, nlp_model, mode, state_path, story_plan=None):
+    roster = roster_fingerprint(engineers)
+    namespace = embedding_namespace(nlp_model.model_name)
+    previous = load_state(state_path, roster, namespace)
+    previous_rows = {key: row for row, key in enumerate(previous['keys'])} if previous else {}
+
+    if story_plan is None:
+        story_plan = generate_story_plan(sections)
+    epics, user_stories = story_plan.epics, story_plan.user_stories
+    # Story ids hash the normalized requirement, so a story moved between epics keeps its row;
+    # the rendered text is part of the key so a template change re-embeds it.
+    keys = [fingerprint(story_id, story) for story_id, story in zip(story_plan.story_ids, user_stories)]
+    reused = np.array([idx for idx, key in enumerate(keys) if key in previous_rows], dtype=np.int64)
+    changed = np.array([idx for idx, key in enumerate(keys) if key not in previous_rows], dtype=np.int64)
+    reused_rows = np.array([previous_rows[keys[idx]] for idx in reused], dtype=np.int64)
+
+    similarities = np.empty((len(keys), len(engineers)), dtype=np.float32)
+    chosen = np.empty(len(keys), dtype=np.int64)
+    if len(reused):
+        similarities[reused] = previous['similarities'][reused_rows]
+        chosen[reused] = previous['chosen'][reused_rows]
+
+    if len(changed):
+        # Only new or edited stories are embedded; they are assigned on top of the
+        # workloads already carried by the stories kept from the previous run.
+        # The saved rows stay plain cosine scores; a learned policy only re-ranks this run's solve.
+        changed_stories = [user_stories[idx] for idx in changed]
+        similarities[changed], solver_scores = nlp_model.score_matrices(changed_stories, engineers)
+        workloads = np.bincount(chosen[reused], minlength=len(engineers))
+        if mode == 'optimized':
+            capacities = np.maximum(engineer_capacities(engineers, len(keys)) - workloads, 0)
+            shortfall = len(changed) - capacities.sum()
+            if shortfall > 0:
+                capacities += -(-shortfall // len(engineers))
+            chosen[changed] = solve_capacitated_assignment(solver_scores, capacities)
+        else:
+            chosen[changed], _ = greedy_workload_assignment(solver_scores, workloads)
+
+    save_state(state_path, roster, namespace, keys, chosen, similarities)
+    logging.info("Incremental run: %d stories reused, %d re-embedded, %d dropped",
+                 len(reused), len(changed), len(previous_rows) - len(reused))
+
+    assignments = AssignmentTable.from_similarities(user_stories, engineers, chosen, similarities)
+    return epics, user_stories, assignments, similarities
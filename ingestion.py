@@ -0,0 +1,258 @@
+import json
+import logging
+import mmap
+import os
+import re
+
+_decoder = json.JSONDecoder()
+
+SECTION_HEADINGS = {
+    'objectives': 'objectives',
+    'goals': 'objectives',
+    'user personas': 'user_personas',
+    'personas': 'user_personas',
+    'functional requirements': 'functional_requirements',
+    'requirements': 'functional_requirements',
+}
+OTHER_HEADINGS = {'overview', 'constraints', 'assumptions', 'non-functional requirements', 'out of scope',
+                  'success metrics', 'timeline', 'risks', 'appendix'}
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)\s*#*$')
+BULLET_PATTERN = re.compile(r'^(?:[-*+•]|\d+[.)])\s+(.*)$')
+NUMBER_CHARS = '0123456789.eE+-'
+
+
+# Incremental reader over a JSON text file. Only the value under the cursor is held in
+# memory: the buffer is compacted before every read and grows (doubling) only while a
+# single value is larger than what has been read so far.
+class JSONStream:
+    def __init__(self, file, chunk_size=1 << 20):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = self.file.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def peek(self, comments=False):
+        # `comments` skips '#' lines between top-level documents, as in the sample files under data/.
+        in_comment = False
+        while True:
+            if in_comment:
+                newline = self.buffer.find('\n', self.pos)
+                self.pos = len(self.buffer) if newline < 0 else newline + 1
+                in_comment = newline < 0
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                if comments and self.buffer[self.pos] == '#':
+                    in_comment = True
+                    continue
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} but found {char or 'end of file'!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self._fill(max(self.chunk_size, len(self.buffer) - self.pos)):
+                    raise
+                continue
+            # A number cut at the buffer edge ("12" of "12.5e3") decodes fine, so only trust it once
+            # a delimiter follows.
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and not self.eof \
+                    and (end == len(self.buffer) or self.buffer[end] in NUMBER_CHARS) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def elements(self):
+        # Positions the cursor on each array element in turn; the caller consumes it.
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self
+            if self.expect(',]') == ']':
+                return
+
+    def members(self):
+        # Yields each object key with the cursor on its value; the caller consumes the value.
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise ValueError(f"Expected an object key but found {self.peek() or 'end of file'!r}")
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+
+def _json_documents(path):
+    # A top-level array yields its elements; otherwise each top-level value (one object or JSON lines).
+    with open(path, 'r', encoding='utf-8') as file:
+        stream = JSONStream(file)
+        while True:
+            char = stream.peek(comments=True)
+            if not char:
+                return
+            if char == '[':
+                yield from stream.elements()
+            else:
+                yield stream
+
+
+def iter_json_documents(path):
+    for stream in _json_documents(path):
+        yield stream.value()
+
+
+def iter_requirement_groups(path):
+    # (document index, epic, requirements) one functional-requirement group at a time, without
+    # building whole documents; other PRD fields are parsed and dropped.
+    for index, stream in enumerate(_json_documents(path)):
+        if stream.peek() != '{':
+            stream.value()
+            continue
+        for key in stream.members():
+            if key == 'functional_requirements' and stream.peek() == '{':
+                for epic in stream.members():
+                    yield index, epic, stream.value()
+            else:
+                stream.value()
+
+
+def parse_prd_lines(lines, product_name):
+    # Markdown headings (or bare section titles in PDF text) switch sections and bullets become
+    # entries; inside Functional Requirements, deeper headings or "Title:" lines start an epic.
+    prd = {'product_name': product_name, 'objectives': [], 'user_personas': [], 'functional_requirements': {}}
+    section = None
+    section_level = 0
+    epic = None
+    named = False
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        heading = HEADING_PATTERN.match(line)
+        text = heading.group(2) if heading else line.rstrip(':').strip()
+        title = text.lower()
+        if heading:
+            level = len(heading.group(1))
+            if title in SECTION_HEADINGS:
+                section, section_level, epic = SECTION_HEADINGS[title], level, None
+            elif section == 'functional_requirements' and level > section_level:
+                epic = text
+                prd['functional_requirements'].setdefault(epic, [])
+            else:
+                if level == 1 and not named:
+                    prd['product_name'], named = text, True
+                section, epic = None, None
+            continue
+        if title in SECTION_HEADINGS:
+            section, section_level, epic = SECTION_HEADINGS[title], 0, None
+            continue
+        if title in OTHER_HEADINGS:
+            section, epic = None, None
+            continue
+
+        bullet = BULLET_PATTERN.match(line)
+        if section == 'functional_requirements':
+            requirements = prd['functional_requirements']
+            if bullet:
+                epic = epic or 'General'
+                requirements.setdefault(epic, []).append(bullet.group(1))
+            elif line.endswith(':'):
+                epic = text
+                requirements.setdefault(epic, [])
+            elif epic and requirements[epic]:
+                requirements[epic][-1] += ' ' + line
+        elif section is not None:
+            if bullet:
+                prd[section].append(bullet.group(1))
+            elif prd[section]:
+                prd[section][-1] += ' ' + line
+            else:
+                prd[section].append(line)
+    return prd
+
+
+def _mapped_lines(path):
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for line in iter(mapped.readline, b''):
+            yield line.decode('utf-8', errors='replace')
+
+
+def iter_markdown_documents(path):
+    yield parse_prd_lines(_mapped_lines(path), os.path.splitext(os.path.basename(path))[0])
+
+
+def iter_pdf_documents(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:
+        raise ImportError("Reading PDF sources requires pypdf (pip install pypdf)") from exc
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        # Pages are decoded one at a time as the parser pulls lines.
+        reader = PdfReader(mapped)
+        lines = (line for page in reader.pages for line in (page.extract_text() or '').splitlines())
+        yield parse_prd_lines(lines, os.path.splitext(os.path.basename(path))[0])
+
+
+INGESTORS = {
+    '.json': iter_json_documents,
+    '.jsonl': iter_json_documents,
+    '.md': iter_markdown_documents,
+    '.markdown': iter_markdown_documents,
+    '.pdf': iter_pdf_documents,
+}
+
+
+def iter_documents(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in INGESTORS:
+        raise ValueError(f"Unsupported document type '{extension}' for {path}, expected one of {sorted(INGESTORS)}")
+    return INGESTORS[extension](path)
+
+
+def load_document(path):
+    # JSON sources are read as cursors, so a second document is noticed without being decoded.
+    json_source = INGESTORS.get(os.path.splitext(path)[1].lower()) is iter_json_documents
+    documents = _json_documents(path) if json_source else iter_documents(path)
+    try:
+        document = next(documents)
+    except StopIteration:
+        raise ValueError(f"No document found in {path}")
+    if json_source:
+        document = document.value()
+    if next(documents, None) is not None:
+        logging.warning("%s holds more than one document; only the first is used (pass it to --batch for all)", path)
+    documents.close()
+    return document
@@ -0,0 +1,89 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+_scorer = None
+
+
+class CachedTokenizer:
+    # Stems each distinct text once per process; RougeScorer calls tokenize() for every pair.
+    def __init__(self, use_stemmer=True, max_entries=100000):
+        from rouge_score import tokenizers
+
+        self._tokenizer = tokenizers.DefaultTokenizer(use_stemmer)
+        self._cache = {}
+        self.max_entries = max_entries
+
+    def tokenize(self, text):
+        tokens = self._cache.get(text)
+        if tokens is None:
+            if len(self._cache) >= self.max_entries:
+                self._cache.clear()
+            tokens = self._tokenizer.tokenize(text)
+            self._cache[text] = tokens
+        return tokens
+
+
+def worker_scorer():
+    # One scorer (and tokenizer cache) per process, created on first use or by the pool initializer.
+    global _scorer
+    if _scorer is None:
+        from rouge_score import rouge_scorer
+
+        _scorer = rouge_scorer.RougeScorer(['rouge1'], use_stemmer=True, tokenizer=CachedTokenizer())
+    return _scorer
+
+
+def score_pairs(pairs):
+    # (BLEU, ROUGE-1 F) per (reference, prediction) pair, exactly as evaluate_assignments scored
+    # them serially; whitespace tokens for BLEU are also split once per distinct text.
+    from nltk.translate.bleu_score import sentence_bleu
+
+    scorer = worker_scorer()
+    split = {}
+    scores = []
+    for reference, prediction in pairs:
+        for text in (reference, prediction):
+            if text not in split:
+                split[text] = text.split()
+        scores.append((sentence_bleu([split[reference]], split[prediction]),
+                       scorer.score(reference, prediction)['rouge1'].fmeasure))
+    return scores
+
+
+# Shards lexical metric jobs over a process pool. Concurrent callers (e.g. batch evaluation
+# threads) each submit their own chunks, so the pool stays busy across PRDs as well.
+class LexicalMetricsEngine:
+    def __init__(self, processes=None, chunk_size=32):
+        self.processes = os.cpu_count() if processes is None else processes
+        self.chunk_size = chunk_size
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: the parent may already run encoder and export threads, which fork would copy mid-state.
+            self._executor = ProcessPoolExecutor(max_workers=self.processes, initializer=worker_scorer,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            logging.info("Started lexical metrics pool with %d processes", self.processes)
+        return self._executor
+
+    def score(self, pairs):
+        pairs = list(pairs)
+        if self.processes <= 1 or not pairs:
+            return score_pairs(pairs)
+        chunk_size = max(1, min(self.chunk_size, -(-len(pairs) // self.processes)))
+        futures = [self._pool().submit(score_pairs, pairs[start:start + chunk_size])
+                   for start in range(0, len(pairs), chunk_size)]
+        return [scores for future in futures for scores in future.result()]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
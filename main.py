@@ -1,47 +1,204 @@
 import argparse
 import logging
-from utils import PRDIngestionJSON, load_engineers, generate_epics_and_stories, save_output, perform_eda, evaluate_assignments
+import os
+from utils import PRDIngestionJSON, load_engineers, evaluate_assignments, EVALUATION_SUITES
 from models import BasicNLPModel, AdvancedNLPModel, ReinforcementLearningModel
 from optimization import optimize_workload_knapsack
+from embeddings import (EMBEDDING_BACKENDS, configure_embedding_backend, configure_encode_scheduler, embedding_namespace,
+                        get_load_metrics, get_scheduler_stats)
+from embedding_cache import EmbeddingCache
+from engineer_index import EngineerIndex
+from batch import run_batch
+from incremental import incremental_assign
+from profiling import profiler
+from exporters import DEFAULT_EXPORT_FORMATS, EXPORTERS, ExportManager
+from lexical_metrics import LexicalMetricsEngine
+from sharding import SHARD_STRATEGIES, ShardedAssigner
+from bandit import FeedbackLog, LinearBandit
+from ingestion import iter_json_documents
+from story_generation import DEDUPE_MODES, DEFAULT_STORY_TEMPLATE, configure_story_generation, generate_story_plan
 
 logging.basicConfig(filename='pipeline.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def run_single(prd_file, mode, nlp_model, engineers, embedding_cache, exporter, eval_metrics='full', eval_sample_size=50,
+               incremental=False, lexical_engine=None, sharder=None):
+    prd_data_loader = PRDIngestionJSON(prd_file)
+    prd_data = prd_data_loader.load_prd()
+
+    sections = nlp_model.extract_sections(prd_data)
+
+    story_plan = generate_story_plan(sections)
+    epics, user_stories = story_plan.epics, story_plan.user_stories
+    similarities = None
+    if incremental and mode != 'basic':
+        state_path = os.path.join(exporter.output_dir, 'output.state.npz')
+        epics, user_stories, assignments, similarities = incremental_assign(sections, engineers, nlp_model, mode,
+                                                                            state_path, story_plan)
+    elif mode == 'basic':
+        assignments = nlp_model.assign_tasks(user_stories, engineers)
+    elif mode == 'advanced' and nlp_model.engineer_index is not None:
+        # Shortlist search replaces the full story x engineer matrix.
+        assignments = nlp_model.assign_tasks(user_stories, engineers)
+    elif sharder is not None:
+        similarities, solver_scores = nlp_model.score_matrices(user_stories, engineers)
+        assignments = sharder.assign(user_stories, engineers, solver_scores,
+                                     solver='lap' if mode == 'optimized' else 'greedy',
+                                     story_plan=story_plan).rescored(similarities)
+    else:
+        similarities, solver_scores = nlp_model.score_matrices(user_stories, engineers)
+        assignments = nlp_model.assign_tasks(user_stories, engineers, solver_scores)
+        if mode == 'optimized':
+            assignments = optimize_workload_knapsack(assignments, engineers, solver_scores)
+        assignments = assignments.rescored(similarities)
+
+    exporter.submit('output', epics, user_stories, assignments, prd_data=prd_data, engineers=engineers,
+                    story_plan=story_plan)
+
+    evaluation_results = evaluate_assignments(assignments, engineers, sections, prd_data,
+                                              embedding_cache=embedding_cache, metrics=eval_metrics,
+                                              sample_size=eval_sample_size, similarities=similarities,
+                                              lexical_engine=lexical_engine)
+    logging.info("Evaluation Results: %s", evaluation_results)
+
 def main():
     parser = argparse.ArgumentParser(description='PRD Automation Pipeline')
     parser.add_argument('--mode', type=str, choices=['basic', 'advanced', 'optimized'], required=True,
                         help='Mode to run the pipeline: basic, advanced, or optimized')
-    parser.add_argument('--prd_file', type=str, required=True, help='Path to the PRD JSON file')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--prd_file', type=str, help='Path to the PRD file (JSON, Markdown or PDF)')
+    source.add_argument('--batch', type=str,
+                        help='Directory of PRD files, a JSONL manifest, or a JSON export holding many PRDs')
     parser.add_argument('--engineers', type=str, required=True, help='Path to the Engineer Profiles JSON file')
+    parser.add_argument('--embedding_cache', type=str, default=None,
+                        help='Directory for the persistent embedding cache (disabled when omitted)')
+    parser.add_argument('--output_dir', type=str, default=None,
+                        help='Directory for exported outputs (default: current directory, batch_outputs in batch mode)')
+    parser.add_argument('--export_formats', type=str, default=','.join(DEFAULT_EXPORT_FORMATS),
+                        help=f"Comma-separated export formats to write: {', '.join(EXPORTERS)}")
+    parser.add_argument('--workers', type=int, default=4, help='Worker threads for batch mode')
+    parser.add_argument('--batch_docs', type=int, default=8,
+                        help='Number of PRDs whose stories are encoded together in batch mode')
+    parser.add_argument('--eval_metrics', type=str, choices=list(EVALUATION_SUITES), default='full',
+                        help='Evaluation suite: workload metrics only, sampled skill match, or full metrics')
+    parser.add_argument('--eval_sample_size', type=int, default=50,
+                        help='Number of stories scored for skill match with --eval_metrics sampled')
+    parser.add_argument('--eval_processes', type=int, default=0,
+                        help='Worker processes for BLEU/ROUGE scoring (0 scores in the calling thread)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse the previous run state in the output directory and only re-embed edited requirements')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record wall time, CPU time, peak RSS and item counts for every pipeline stage')
+    parser.add_argument('--profile_output', type=str, default='profile.trace.json',
+                        help='Where --profile writes its records')
+    parser.add_argument('--profile_format', type=str, choices=['chrome', 'jsonl'], default='chrome',
+                        help='Chrome trace (chrome://tracing, Perfetto) or one JSON record per line')
+    parser.add_argument('--encode_batch_size', type=int, default=64,
+                        help='Maximum number of texts per embedding forward pass')
+    parser.add_argument('--embedding_backend', type=str, choices=list(EMBEDDING_BACKENDS), default='torch',
+                        help='Encoder backend: fp32 PyTorch, dynamic int8-quantized PyTorch, or ONNX Runtime')
+    parser.add_argument('--model_dir', type=str, default=None,
+                        help='Local directory holding the embedding model; loads without network access')
+    parser.add_argument('--engineer_index', type=str, default=None,
+                        help='Path of a persistent engineer index (.npz); advanced mode then scores each story '
+                             'against a top-k shortlist instead of the whole roster')
+    parser.add_argument('--index_nprobe', type=int, default=8,
+                        help='Engineer index clusters searched per story; higher trades latency for recall')
+    parser.add_argument('--index_top_k', type=int, default=20,
+                        help='Shortlist size re-ranked by workload for each story')
+    parser.add_argument('--shard_by', type=str, choices=list(SHARD_STRATEGIES), default=None,
+                        help='Split each PRD\'s assignment into shards by epic or by similarity cluster and solve them '
+                             'in parallel (advanced/optimized modes), followed by a global rebalancing pass')
+    parser.add_argument('--shards', type=int, default=0,
+                        help='Number of clusters for --shard_by cluster (default: --shard_processes)')
+    parser.add_argument('--shard_processes', type=int, default=0,
+                        help='Worker processes solving shards (default: one per CPU)')
+    parser.add_argument('--shard_seed', type=int, default=0, help='Seed for cluster sharding')
+    parser.add_argument('--policy_state', type=str, default=None,
+                        help='Optimized mode: .npz file holding the feedback-trained assignment policy (created if missing)')
+    parser.add_argument('--feedback', type=str, default=None,
+                        help='JSON/JSONL feedback records ({"story", "engineer", "action": accept|reject|reassign, '
+                             '"reassigned_to"}) to learn from before assigning; requires --policy_state')
+    parser.add_argument('--feedback_log', type=str, default=None,
+                        help='Append-only log of applied feedback for offline replay (default: next to --policy_state)')
+    parser.add_argument('--policy_alpha', type=float, default=0.02,
+                        help='Exploration bonus weight for engineers with little feedback on similar stories')
+    parser.add_argument('--policy_weight', type=float, default=0.1,
+                        help='Weight of the learned feedback reward added to the cosine score')
+    parser.add_argument('--story_template', type=str, default=DEFAULT_STORY_TEMPLATE,
+                        help='User story template; may use the {requirement} and {epic} fields')
+    parser.add_argument('--dedupe', type=str, choices=list(DEDUPE_MODES), default='exact',
+                        help='Collapse repeated requirements before embedding: exact (normalized text), '
+                             'minhash (also near-duplicates) or none')
+    parser.add_argument('--minhash_threshold', type=float, default=0.8,
+                        help='Estimated Jaccard similarity at which --dedupe minhash merges two requirements')
 
     args = parser.parse_args()
-
-    prd_data_loader = PRDIngestionJSON(args.prd_file)
-    prd_data = prd_data_loader.load_prd()
+    if args.feedback and not args.policy_state:
+        parser.error('--feedback requires --policy_state')
+    if args.profile:
+        profiler.enable()
 
     engineers = load_engineers(args.engineers)
+    configure_encode_scheduler(batch_size=args.encode_batch_size)
+    configure_embedding_backend(args.embedding_backend, args.model_dir)
+    configure_story_generation(args.story_template, args.dedupe, args.minhash_threshold)
+    embedding_cache = EmbeddingCache(args.embedding_cache, embedding_namespace()) if args.embedding_cache else None
+
+    engineer_index = EngineerIndex.open(args.engineer_index, args.index_nprobe) if args.engineer_index else None
 
     if args.mode == 'basic':
         nlp_model = BasicNLPModel()
     elif args.mode == 'advanced':
-        nlp_model = AdvancedNLPModel()
-    else:
-        nlp_model = ReinforcementLearningModel()
-
-    sections = nlp_model.extract_sections(prd_data)
-    epics, user_stories = generate_epics_and_stories(sections)
-
-    if args.mode == 'optimized':
-        initial_assignments = nlp_model.assign_tasks(user_stories, engineers)
-        assignments = optimize_workload_knapsack(initial_assignments, engineers)
+        nlp_model = AdvancedNLPModel(embedding_cache=embedding_cache, engineer_index=engineer_index,
+                                     index_top_k=args.index_top_k)
     else:
-        assignments = nlp_model.assign_tasks(user_stories, engineers)
-
-    save_output(epics, user_stories, assignments)
-
-    evaluation_results = evaluate_assignments(assignments, engineers, sections, prd_data)
-    logging.info(f"Evaluation Results: {evaluation_results}")
-
-    perform_eda(prd_data, engineers)
+        policy = None
+        if args.policy_state:
+            policy = LinearBandit.open(args.policy_state, alpha=args.policy_alpha, reward_weight=args.policy_weight)
+        nlp_model = ReinforcementLearningModel(embedding_cache=embedding_cache, policy=policy)
+        if args.feedback:
+            records = list(iter_json_documents(args.feedback))
+            nlp_model.learn(records)
+            FeedbackLog(args.feedback_log or os.path.splitext(args.policy_state)[0] + '.feedback.jsonl').append(records)
+
+    output_dir = args.output_dir or ('batch_outputs' if args.batch else '.')
+    export_formats = [export_format for export_format in args.export_formats.split(',') if export_format]
+    lexical_engine = LexicalMetricsEngine(args.eval_processes) if args.eval_processes > 0 else None
+    sharder = None
+    if args.shard_by and args.mode != 'basic':
+        sharder = ShardedAssigner(args.shard_by, args.shards or None, args.shard_processes or None, args.shard_seed)
+    with ExportManager(output_dir, export_formats) as exporter:
+        if args.batch:
+            run_batch(args.batch, engineers, nlp_model, args.mode, output_dir, exporter,
+                      workers=args.workers, batch_docs=args.batch_docs, embedding_cache=embedding_cache,
+                      eval_metrics=args.eval_metrics, eval_sample_size=args.eval_sample_size,
+                      incremental=args.incremental, lexical_engine=lexical_engine, sharder=sharder)
+        else:
+            run_single(args.prd_file, args.mode, nlp_model, engineers, embedding_cache, exporter,
+                       eval_metrics=args.eval_metrics, eval_sample_size=args.eval_sample_size,
+                       incremental=args.incremental, lexical_engine=lexical_engine, sharder=sharder)
+    if lexical_engine is not None:
+        lexical_engine.close()
+    if sharder is not None:
+        sharder.close()
+
+    if engineer_index is not None and len(engineer_index):
+        engineer_index.save(args.engineer_index)
+    if getattr(nlp_model, 'policy', None) is not None:
+        nlp_model.policy.save(args.policy_state)
+    logging.info("Embedding model load metrics: %s", get_load_metrics())
+    logging.info("Encode scheduler stats: %s", get_scheduler_stats())
+    if embedding_cache is not None:
+        embedding_cache.flush()
+        logging.info("Embedding cache stats: %s", embedding_cache.stats())
+    if args.profile:
+        if args.profile_format == 'jsonl':
+            profiler.write_jsonl(args.profile_output)
+        else:
+            profiler.write_chrome_trace(args.profile_output)
+        logging.info("Stage profile summary: %s", profiler.summary())
+    if exporter.failed:
+        raise SystemExit(f"Export failed for: {', '.join(exporter.failed)}")
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,15 @@
 import logging
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
+from assignment_table import AssignmentTable
+from embeddings import DEFAULT_MODEL_NAME, cosine_similarity_matrix, encode_texts, get_embedding_model
+from optimization import greedy_shortlist_assignment, greedy_workload_assignment, optimize_workload_knapsack
+from profiling import traced
 
 class BasicNLPModel:
     def __init__(self):
         pass
 
+    @traced('extract_sections')
     def extract_sections(self, prd_data):
         objectives = prd_data.get('objectives', [])
         functional_requirements = prd_data.get('functional_requirements', {})
@@ -18,22 +23,27 @@ class BasicNLPModel:
         logging.info("Extracted sections: Objectives, Functional Requirements, User Personas")
         return sections
 
+    @traced('assign_tasks', items=lambda self, stories, *args, **kwargs: len(stories))
     def assign_tasks(self, stories, engineers):
-        assignments = []
-        workloads = {eng['name']: 0 for eng in engineers}
+        assignments = AssignmentTable(stories, engineers, np.arange(len(stories)) % len(engineers))
 
-        for idx, story in enumerate(stories):
-            engineer = engineers[idx % len(engineers)]
-            workloads[engineer['name']] += 1
-            assignments.append((story, engineer['name']))
-
-        logging.info(f"Basic Mode Task Assignments: {assignments}")
+        logging.info("Basic Mode Task Assignments: %s", assignments)
         return assignments
 
 class AdvancedNLPModel:
-    def __init__(self):
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, device=None, embedding_cache=None, engineer_index=None,
+                 index_top_k=20):
+        self.model_name = model_name
+        self.device = device
+        self.embedding_cache = embedding_cache
+        self.engineer_index = engineer_index
+        self.index_top_k = index_top_k
+        self.embedding_model = get_embedding_model(model_name, device)
+
+    def encode(self, texts):
+        return encode_texts(texts, self.model_name, self.device, self.embedding_cache)
+
+    @traced('extract_sections')
     def extract_sections(self, prd_data):
         return {
             'objectives': prd_data.get('objectives', []),
@@ -41,32 +51,73 @@ class AdvancedNLPModel:
             'user_personas': prd_data.get('user_personas', [])
         }
 
-    def assign_tasks(self, stories, engineers):
-        story_embeddings = self.embedding_model.encode(stories, convert_to_tensor=True)
+    def score_matrices(self, stories, engineers):
+        # (cosine similarities, solver scores). Solvers assign from the second; evaluation, exported
+        # scores and incremental state keep the first.
         engineer_descriptions = [eng['skills'] for eng in engineers]
-        engineer_embeddings = self.embedding_model.encode(engineer_descriptions, convert_to_tensor=True)
-
-        assignments = []
-        workloads = {eng['name']: 0 for eng in engineers}
-
-        for story, story_embedding in zip(stories, story_embeddings):
-            similarities = util.pytorch_cos_sim(story_embedding, engineer_embeddings)[0]
-            scores = {eng['name']: similarities[idx].item() / (1 + workloads[eng['name']])
-                      for idx, eng in enumerate(engineers)}
-
-            best_engineer = max(scores, key=scores.get)
-            workloads[best_engineer] += 1
-            assignments.append((story, best_engineer))
-
-        logging.info(f"Advanced Mode Task Assignments: {assignments}")
+        embeddings = self.encode(list(stories) + engineer_descriptions)
+        similarities = cosine_similarity_matrix(embeddings[:len(stories)], embeddings[len(stories):])
+        return similarities, self.adjust_scores(stories, engineers, similarities, embeddings[:len(stories)])
+
+    def adjust_scores(self, stories, engineers, similarities, story_embeddings):
+        # Hook for models that re-rank on top of the cosine scores (batch.py calls it per document).
+        return similarities
+
+    @traced('engineer_shortlist', items=lambda self, stories, *args, **kwargs: len(stories))
+    def shortlist(self, stories, engineers):
+        self.engineer_index.sync(engineers, self.encode)
+        candidates, scores = self.engineer_index.search(self.encode(stories), self.index_top_k)
+        return self.engineer_index.positions_for(engineers)[candidates], scores
+
+    @traced('assign_tasks', items=lambda self, stories, *args, **kwargs: len(stories))
+    def assign_tasks(self, stories, engineers, similarities=None):
+        if similarities is None and self.engineer_index is not None:
+            # Large rosters: workload-aware re-ranking only over each story's top-k shortlist.
+            candidates, scores = self.shortlist(stories, engineers)
+            chosen, _ = greedy_shortlist_assignment(candidates, scores, len(engineers))
+            picked = np.argmax(candidates == chosen[:, None], axis=1)
+            assignments = AssignmentTable(stories, engineers, chosen, scores[np.arange(len(chosen)), picked])
+        else:
+            if similarities is None:
+                similarities = self.score_matrices(stories, engineers)[1]
+            chosen, _ = greedy_workload_assignment(similarities)
+            assignments = AssignmentTable.from_similarities(stories, engineers, chosen, similarities)
+
+        logging.info("Advanced Mode Task Assignments: %s", assignments)
         return assignments
 
 class ReinforcementLearningModel(AdvancedNLPModel):
-    def assign_tasks(self, stories, engineers):
-        assignments = super().assign_tasks(stories, engineers)
-        logging.info(f"Optimized Mode Task Assignments: {assignments}")
+    # Optional LinearBandit policy learned from accept/reassign feedback; it re-ranks the
+    # cosine scores using the story embeddings already computed for them.
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, device=None, embedding_cache=None, engineer_index=None,
+                 index_top_k=20, policy=None):
+        super().__init__(model_name, device, embedding_cache, engineer_index, index_top_k)
+        self.policy = policy
+
+    def adjust_scores(self, stories, engineers, similarities, story_embeddings):
+        if self.policy is None:
+            return similarities
+        self.policy.remember(stories, story_embeddings)
+        return self.policy.adjust(similarities, story_embeddings, engineers)
+
+    def learn(self, records):
+        return self.policy.apply_feedback(records, self.encode)
+
+    def assign_tasks(self, stories, engineers, similarities=None):
+        assignments = super().assign_tasks(stories, engineers, similarities)
+        logging.info("Optimized Mode Task Assignments: %s", assignments)
         return assignments
 
+def assign_stories(nlp_model, mode, user_stories, engineers):
+    # Shared by the service and app.py; returns the similarity matrix so evaluation can reuse it.
+    if mode == 'basic':
+        return nlp_model.assign_tasks(user_stories, engineers), None
+    similarities, solver_scores = nlp_model.score_matrices(user_stories, engineers)
+    assignments = nlp_model.assign_tasks(user_stories, engineers, solver_scores)
+    if mode == 'optimized':
+        assignments = optimize_workload_knapsack(assignments, engineers, solver_scores)
+    return assignments.rescored(similarities), similarities
+
 # [2022-12-30] (Embeddings) schedule note: Document PRD automation results for Embeddings
 
 # [2023-01-12] (Extraction) schedule note: Document PRD automation results for Extraction
@@ -1,41 +1,125 @@
 import numpy as np
 import logging
-
-def optimize_workload_knapsack(assignments, engineers):
-    num_tasks = len(assignments)
-    num_engineers = len(engineers)
-    engineer_workloads = {eng['name']: 0 for eng in engineers}
-
-    skill_match_scores = np.zeros((num_tasks, num_engineers))
-    for task_idx, (story, _) in enumerate(assignments):
-        for eng_idx, engineer in enumerate(engineers):
-            skill_match_scores[task_idx, eng_idx] = engineer_workloads[engineer['name']] + 1
-
-    dp = np.zeros((num_tasks + 1, num_engineers + 1))
-    keep = np.zeros((num_tasks, num_engineers))
-
-    for task_idx in range(1, num_tasks + 1):
-        for eng_idx in range(num_engineers):
-            task_score = skill_match_scores[task_idx - 1, eng_idx]
-            if dp[task_idx - 1, eng_idx] + task_score > dp[task_idx, eng_idx]:
-                dp[task_idx, eng_idx] = dp[task_idx - 1, eng_idx] + task_score
-                keep[task_idx - 1, eng_idx] = 1
-
-    best_assignment = []
-    task_idx = num_tasks - 1
-    eng_idx = num_engineers - 1
-    while task_idx >= 0 and eng_idx >= 0:
-        if keep[task_idx, eng_idx] == 1:
-            story, _ = assignments[task_idx]
-            best_engineer = engineers[eng_idx]['name']
-            best_assignment.append((story, best_engineer))
-            engineer_workloads[best_engineer] += 1
-            task_idx -= 1
-            eng_idx -= 1
-        else:
-            task_idx -= 1
-
-    logging.info(f"Optimized Assignments (Knapsack DP): {best_assignment}")
+from assignment_table import as_assignment_table
+from profiling import traced
+
+def greedy_workload_assignment(similarities, initial_workloads=None, capacities=None):
+    similarities = np.asarray(similarities, dtype=np.float64)
+    num_tasks, num_engineers = similarities.shape
+    workloads = np.zeros(num_engineers) if initial_workloads is None else np.array(initial_workloads, dtype=np.float64)
+    chosen = np.empty(num_tasks, dtype=np.int64)
+
+    # Each pick decays the winner's future scores by 1 / (1 + workload), so the loop over
+    # tasks stays sequential; the per-task work is a single vector op over all engineers.
+    # With `capacities`, engineers that are full are skipped.
+    for task_idx in range(num_tasks):
+        scores = similarities[task_idx] / (1 + workloads)
+        if capacities is not None:
+            scores = np.where(workloads < capacities, scores, -np.inf)
+        best = int(np.argmax(scores))
+        chosen[task_idx] = best
+        workloads[best] += 1
+
+    return chosen, workloads
+
+def greedy_shortlist_assignment(candidates, candidate_scores, num_engineers, initial_workloads=None):
+    # Same workload-decay rule as greedy_workload_assignment, restricted to each task's top-k shortlist.
+    workloads = np.zeros(num_engineers) if initial_workloads is None else np.array(initial_workloads, dtype=np.float64)
+    candidate_scores = np.asarray(candidate_scores, dtype=np.float64)
+    chosen = np.empty(len(candidates), dtype=np.int64)
+
+    for task_idx in range(len(candidates)):
+        shortlist = candidates[task_idx]
+        best = shortlist[int(np.argmax(candidate_scores[task_idx] / (1 + workloads[shortlist])))]
+        chosen[task_idx] = best
+        workloads[best] += 1
+
+    return chosen, workloads
+
+def engineer_capacities(engineers, num_tasks):
+    default_capacity = -(-num_tasks // len(engineers)) if engineers else 0
+    return np.array([eng.get('capacity', default_capacity) for eng in engineers], dtype=np.int64)
+
+def solve_capacitated_assignment(similarities, capacities, balance_weight=0.0):
+    from scipy.optimize import linear_sum_assignment
+
+    similarities = np.asarray(similarities, dtype=np.float64)
+    num_tasks, num_engineers = similarities.shape
+    capacities = np.minimum(np.asarray(capacities, dtype=np.int64), num_tasks)
+    if capacities.sum() < num_tasks:
+        raise ValueError(f"Engineer capacity ({capacities.sum()}) is lower than the number of tasks ({num_tasks})")
+    if num_tasks == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Replicate each engineer once per unit of capacity and solve the rectangular LAP.
+    # The optional slot penalty makes later slots slightly more expensive, which turns
+    # ties between equally skilled engineers into an even workload split.
+    slot_engineer = np.repeat(np.arange(num_engineers), capacities)
+    slot_rank = np.concatenate([np.arange(cap) for cap in capacities])
+    cost = balance_weight * slot_rank[np.newaxis, :] - similarities[:, slot_engineer]
+    task_idx, slot_idx = linear_sum_assignment(cost)
+
+    chosen = np.empty(num_tasks, dtype=np.int64)
+    chosen[task_idx] = slot_engineer[slot_idx]
+    return chosen
+
+def rebalance_assignment(similarities, chosen, capacities):
+    similarities = np.asarray(similarities, dtype=np.float64)
+    capacities = np.asarray(capacities, dtype=np.int64)
+    chosen = np.array(chosen, dtype=np.int64)
+    workloads = np.bincount(chosen, minlength=len(capacities))
+    moves = 0
+
+    # Overflow first: move the stories that lose the least score to engineers with spare capacity.
+    for engineer in np.flatnonzero(workloads > capacities):
+        tasks = np.flatnonzero(chosen == engineer)
+        while workloads[engineer] > capacities[engineer]:
+            scores = np.where(workloads < capacities, similarities[tasks], -np.inf)
+            targets = np.argmax(scores, axis=1)
+            loss = similarities[tasks, engineer] - scores[np.arange(len(tasks)), targets]
+            pick = int(np.argmin(loss))
+            chosen[tasks[pick]] = targets[pick]
+            workloads[engineer] -= 1
+            workloads[targets[pick]] += 1
+            tasks = np.delete(tasks, pick)
+            moves += 1
+
+    # Then one pass, largest gain first, moving stories to better engineers that still have room.
+    rows = np.arange(len(chosen))
+    gains = similarities.max(axis=1) - similarities[rows, chosen]
+    for task_idx in np.argsort(-gains, kind='stable'):
+        if gains[task_idx] <= 0:
+            break
+        scores = np.where(workloads < capacities, similarities[task_idx], -np.inf)
+        target = int(np.argmax(scores))
+        if scores[target] > similarities[task_idx, chosen[task_idx]]:
+            workloads[chosen[task_idx]] -= 1
+            workloads[target] += 1
+            chosen[task_idx] = target
+            moves += 1
+
+    return chosen, moves
+
+def assignment_objective(similarities, chosen):
+    similarities = np.asarray(similarities)
+    return float(similarities[np.arange(len(chosen)), chosen].sum())
+
+@traced('optimize_workload_knapsack', items=lambda assignments, *args, **kwargs: len(assignments))
+def optimize_workload_knapsack(assignments, engineers, similarities=None, capacities=None, balance_weight=0.0):
+    assignments = as_assignment_table(assignments, engineers)
+    rows = np.arange(len(assignments))
+    if similarities is None:
+        # Without skill scores, prefer keeping each story with its initial engineer and
+        # let the capacity constraint move only the overflow.
+        similarities = np.zeros((len(assignments), len(engineers)))
+        similarities[rows, assignments.engineer_indices] = 1.0
+    if capacities is None:
+        capacities = engineer_capacities(engineers, len(assignments))
+
+    chosen = solve_capacitated_assignment(similarities, capacities, balance_weight)
+    best_assignment = assignments.with_choice(chosen, np.asarray(similarities)[rows, chosen])
+
+    logging.info("Optimized Assignments (capacitated LAP): %s", best_assignment)
     return best_assignment
 
 # [2023-01-03] (Extraction) schedule note: Document PRD automation results for Extraction
@@ -0,0 +1,125 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows has no getrusage; peak RSS is reported as None
+    resource = None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self):
+        self.enabled = True
+
+    def active(self):
+        return self.enabled or getattr(self._local, 'collector', None) is not None
+
+    @contextmanager
+    def collect(self):
+        # Records the stages run by the calling thread into a list of their own, whether or not the
+        # profiler is enabled, so a long-running server can time one run without growing `records`.
+        previous = getattr(self._local, 'collector', None)
+        collected = []
+        self._local.collector = collected
+        try:
+            yield collected
+        finally:
+            self._local.collector = previous
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+            self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, items=None):
+        collector = getattr(self._local, 'collector', None)
+        if not self.enabled and collector is None:
+            yield {}
+            return
+        info = {'items': items}
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield info
+        finally:
+            end_wall = time.perf_counter()
+            record = {
+                'stage': name,
+                'start': start_wall - self._origin,
+                'wall_seconds': end_wall - start_wall,
+                'cpu_seconds': time.thread_time() - start_cpu,
+                'peak_rss_mb': peak_rss_mb(),
+                'items': info.get('items'),
+                'thread': threading.current_thread().name,
+                'tid': threading.get_ident(),
+            }
+            if collector is not None:
+                collector.append(record)
+            if self.enabled:
+                with self._lock:
+                    self.records.append(record)
+
+    def summary(self):
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['stage'], {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'items': 0})
+            total['calls'] += 1
+            total['wall_seconds'] += record['wall_seconds']
+            total['cpu_seconds'] += record['cpu_seconds']
+            total['items'] += record['items'] or 0
+        return totals
+
+    def write_jsonl(self, path):
+        with open(path, 'w') as out:
+            for record in self.records:
+                out.write(json.dumps(record) + '\n')
+
+    def write_chrome_trace(self, path):
+        events = [{
+            'name': record['stage'],
+            'ph': 'X',
+            'ts': record['start'] * 1e6,
+            'dur': record['wall_seconds'] * 1e6,
+            'pid': os.getpid(),
+            'tid': record['tid'],
+            'args': {key: record[key] for key in ('cpu_seconds', 'peak_rss_mb', 'items', 'thread')},
+        } for record in self.records]
+        with open(path, 'w') as out:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, out)
+
+
+profiler = Profiler()
+
+
+def traced(name, items=None):
+    # `items` receives the call arguments and returns the number of work items for the record.
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.active():
+                return fn(*args, **kwargs)
+            with profiler.stage(name, items(*args, **kwargs) if items else None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,343 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import evaluate_assignments, EVALUATION_SUITES
+from story_generation import generate_story_plan
+from models import BasicNLPModel, AdvancedNLPModel, ReinforcementLearningModel, assign_stories
+from embeddings import (DEFAULT_MODEL_NAME, EMBEDDING_BACKENDS, configure_embedding_backend, embedding_namespace,
+                        get_load_metrics, get_scheduler_stats)
+from embedding_cache import EmbeddingCache
+from bandit import FEEDBACK_ACTIONS, FeedbackLog, LinearBandit
+
+MODES = ('basic', 'advanced', 'optimized')
+# Read-only routes; identical concurrent requests to them share one computation.
+COALESCED_ROUTES = ('/extract_sections', '/generate_stories', '/assign', '/evaluate')
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+# Raised for malformed payloads (400). Anything else raised while handling a request is a server error (500).
+class RequestError(Exception):
+    pass
+
+
+def require(payload, field, kind, description, default=None):
+    value = payload.get(field, default)
+    if not isinstance(value, kind) or (isinstance(value, bool) and kind is not bool):
+        raise RequestError(f"'{field}' must be {description}")
+    return value
+
+
+def require_choice(payload, field, choices, default):
+    value = payload.get(field, default)
+    if value not in choices:
+        raise RequestError(f"'{field}' must be one of {choices}, got {value!r}")
+    return value
+
+
+def require_strings(values, field):
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise RequestError(f"'{field}' must be a list of strings")
+    return values
+
+
+def require_prd_fields(payload, field):
+    # A PRD or its extracted sections: optional objectives/user_personas lists and requirement groups.
+    value = require(payload, field, dict, 'a JSON object')
+    for section in ('objectives', 'user_personas'):
+        require_strings(value.get(section, []), f"{field}.{section}")
+    requirements = require(value, 'functional_requirements', dict, 'a JSON object', {})
+    for epic, group in requirements.items():
+        require_strings(group, f"{field}.functional_requirements.{epic}")
+    return value
+
+
+def require_engineers(payload):
+    engineers = require(payload, 'engineers', list, 'a non-empty list of engineer objects')
+    if not engineers or not all(isinstance(eng, dict) and isinstance(eng.get('name'), str)
+                                and isinstance(eng.get('skills'), str) for eng in engineers):
+        raise RequestError("'engineers' must be a non-empty list of objects with string 'name' and 'skills'")
+    return engineers
+
+
+def require_assignments(payload, engineers):
+    assignments = require(payload, 'assignments', list, 'a list of [story, engineer] pairs')
+    names = {eng['name'] for eng in engineers}
+    for pair in assignments:
+        if not (isinstance(pair, list) and len(pair) == 2 and isinstance(pair[0], str) and pair[1] in names):
+            raise RequestError(f"'assignments' must be [story, engineer] pairs naming roster engineers, got {pair!r}")
+    return [tuple(pair) for pair in assignments]
+
+
+def require_feedback(payload):
+    records = require(payload, 'feedback', list, 'a list of feedback records')
+    for record in records:
+        if not (isinstance(record, dict) and isinstance(record.get('story'), str)
+                and isinstance(record.get('engineer'), str)):
+            raise RequestError(f"Feedback records need string 'story' and 'engineer', got {record!r}")
+        if record.get('action', 'accept') not in FEEDBACK_ACTIONS:
+            raise RequestError(f"Feedback 'action' must be one of {FEEDBACK_ACTIONS}, got {record.get('action')!r}")
+        if record.get('action') == 'reassign' and not isinstance(record.get('reassigned_to'), str):
+            raise RequestError("Reassign feedback needs a string 'reassigned_to'")
+    return records
+
+
+class ScoringService:
+    # Minimal ASGI application: models stay loaded for the life of the process, identical
+    # concurrent read-only requests share one computation, and at most `max_queue` requests wait
+    # behind the `workers` running ones before new work is rejected with 503.
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, embedding_cache=None, workers=4, max_queue=32,
+                 warm_modes=('advanced',), policy_state=None, feedback_log=None):
+        self.model_name = model_name
+        self.embedding_cache = embedding_cache
+        self.policy_state = policy_state
+        self.feedback_log = FeedbackLog(feedback_log) if feedback_log else None
+        self.workers = workers
+        self.max_queue = max_queue
+        self.warm_modes = warm_modes
+        self._models = {}
+        self._models_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='service')
+        self._inflight = {}
+        self._admitted = 0
+        self.stats = {'requests': 0, 'coalesced': 0, 'rejected': 0, 'failed': 0}
+        self.routes = {
+            '/extract_sections': self.extract_sections,
+            '/generate_stories': self.generate_stories,
+            '/assign': self.assign,
+            '/evaluate': self.evaluate,
+            '/feedback': self.feedback,
+        }
+
+    def model(self, mode):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+        model = self._models.get(mode)
+        if model is None:
+            with self._models_lock:
+                model = self._models.get(mode)
+                if model is None:
+                    if mode == 'basic':
+                        model = BasicNLPModel()
+                    elif mode == 'advanced':
+                        model = AdvancedNLPModel(model_name=self.model_name, embedding_cache=self.embedding_cache)
+                    else:
+                        policy = LinearBandit.open(self.policy_state) if self.policy_state else None
+                        model = ReinforcementLearningModel(model_name=self.model_name,
+                                                           embedding_cache=self.embedding_cache, policy=policy)
+                    self._models[mode] = model
+        return model
+
+    def warm(self):
+        for mode in self.warm_modes:
+            self.model(mode)
+        logging.info("Scoring service ready with warm models: %s", sorted(self._models))
+
+    def extract_sections(self, payload):
+        mode = require_choice(payload, 'mode', MODES, 'basic')
+        return {'sections': self.model(mode).extract_sections(require_prd_fields(payload, 'prd'))}
+
+    def sections(self, payload):
+        if 'sections' in payload:
+            return require_prd_fields(payload, 'sections')
+        return self.extract_sections(payload)['sections']
+
+    def generate_stories(self, payload):
+        plan = generate_story_plan(self.sections(payload))
+        return {'epics': plan.epics, 'user_stories': plan.user_stories, 'story_ids': plan.story_ids,
+                'epic_stories': plan.epic_stories()}
+
+    def assign(self, payload):
+        mode = require_choice(payload, 'mode', MODES, 'advanced')
+        engineers = require_engineers(payload)
+        result = {}
+        if 'user_stories' in payload:
+            user_stories = require_strings(payload['user_stories'], 'user_stories')
+        else:
+            result = self.generate_stories(payload)
+            user_stories = result['user_stories']
+        assignments, _ = assign_stories(self.model(mode), mode, user_stories, engineers)
+        result['assignments'] = assignments.to_pairs()
+        return result
+
+    def evaluate(self, payload):
+        metrics = require_choice(payload, 'metrics', EVALUATION_SUITES, 'full')
+        sample_size = require(payload, 'sample_size', int, 'a positive integer', 50)
+        if sample_size < 1:
+            raise RequestError("'sample_size' must be a positive integer")
+        engineers = require_engineers(payload)
+        prd_data = require_prd_fields(payload, 'prd')
+        sections = {'objectives': [], 'user_personas': [], 'functional_requirements': {}}
+        sections.update(self.sections(payload))
+        result = {}
+        similarities = None
+        if 'assignments' in payload:
+            assignments = require_assignments(payload, engineers)
+        else:
+            mode = require_choice(payload, 'mode', MODES, 'advanced')
+            result = self.generate_stories({'sections': sections})
+            assignments, similarities = assign_stories(self.model(mode), mode, result['user_stories'], engineers)
+            result['assignments'] = assignments.to_pairs()
+        timings = {}
+        evaluation = evaluate_assignments(assignments, engineers, sections, prd_data,
+                                          embedding_cache=self.embedding_cache, metrics=metrics,
+                                          sample_size=sample_size, similarities=similarities,
+                                          timings=timings, model_name=self.model_name)
+        result['evaluation'] = {metric: float(value) for metric, value in evaluation.items()}
+        result['evaluation_timings'] = timings
+        return result
+
+    def feedback(self, payload):
+        # Online policy update for optimized mode; records are logged first so they can be replayed.
+        records = require_feedback(payload)
+        model = self.model('optimized')
+        if model.policy is None:
+            raise RequestError("Feedback needs a policy; start the service with --policy_state")
+        if self.feedback_log is not None:
+            self.feedback_log.append(records)
+        applied = model.learn(records)
+        model.policy.save(self.policy_state)
+        return {'applied': applied, 'updates': model.policy.updates}
+
+    def service_stats(self):
+        return dict(self.stats, in_flight=len(self._inflight), admitted=self._admitted, workers=self.workers,
+                    max_queue=self.max_queue, models=sorted(self._models), load_metrics=get_load_metrics(),
+                    scheduler_stats=get_scheduler_stats())
+
+    async def handle(self, path, payload):
+        handler = self.routes[path]
+        key = None
+        if path in COALESCED_ROUTES:
+            key = hashlib.sha256(path.encode('utf-8') + json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+        self.stats['requests'] += 1
+        shared = self._inflight.get(key) if key is not None else None
+        if shared is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(shared)
+
+        if self._admitted >= self.workers + self.max_queue:
+            self.stats['rejected'] += 1
+            raise ServiceBusy()
+        self._admitted += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, handler, payload)
+        if key is not None:
+            self._inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if key is not None:
+                self._inflight.pop(key, None)
+            self._admitted -= 1
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        path = scope['path'].rstrip('/') or '/'
+        if scope['method'] == 'GET' and path in ('/health', '/stats'):
+            await self.respond(send, 200, self.service_stats())
+            return
+        if path not in self.routes:
+            await self.respond(send, 404, {'error': f"Unknown endpoint {path}"})
+            return
+        if scope['method'] != 'POST':
+            await self.respond(send, 405, {'error': 'Use POST with a JSON body'})
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        try:
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError as exc:
+                raise RequestError(f"Invalid JSON body: {exc}")
+            if not isinstance(payload, dict):
+                raise RequestError("The JSON body must be an object")
+            result = await self.handle(path, payload)
+        except ServiceBusy:
+            await self.respond(send, 503, {'error': 'Service is at capacity, retry later'},
+                               headers=[(b'retry-after', b'1')])
+        except RequestError as exc:
+            await self.respond(send, 400, {'error': str(exc)})
+        except Exception as exc:
+            self.stats['failed'] += 1
+            logging.exception("Request to %s failed", path)
+            await self.respond(send, 500, {'error': str(exc)})
+        else:
+            await self.respond(send, 200, result)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await asyncio.get_running_loop().run_in_executor(self._executor, self.warm)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.embedding_cache is not None:
+                    self.embedding_cache.flush()
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def respond(self, send, status, payload, headers=()):
+        body = json.dumps(payload).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode('ascii'))] + list(headers)})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = ScoringService()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PRD Automation scoring service')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=4, help='Requests processed concurrently')
+    parser.add_argument('--max_queue', type=int, default=32,
+                        help='Requests allowed to wait for a worker before new ones get 503')
+    parser.add_argument('--warm_modes', type=str, default='advanced',
+                        help='Comma-separated modes whose models are loaded at startup')
+    parser.add_argument('--embedding_cache', type=str, default=None,
+                        help='Directory for the persistent embedding cache (disabled when omitted)')
+    parser.add_argument('--embedding_backend', type=str, choices=list(EMBEDDING_BACKENDS), default='torch',
+                        help='Encoder backend: fp32 PyTorch, dynamic int8-quantized PyTorch, or ONNX Runtime')
+    parser.add_argument('--model_dir', type=str, default=None,
+                        help='Local directory holding the embedding model; loads without network access')
+    parser.add_argument('--policy_state', type=str, default=None,
+                        help='Feedback-trained policy for optimized mode; enables POST /feedback')
+    parser.add_argument('--feedback_log', type=str, default=None,
+                        help='Append-only log of feedback received by POST /feedback (default: next to --policy_state)')
+    args = parser.parse_args()
+
+    import uvicorn
+
+    logging.basicConfig(filename='pipeline.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    configure_embedding_backend(args.embedding_backend, args.model_dir)
+    embedding_cache = EmbeddingCache(args.embedding_cache, embedding_namespace()) if args.embedding_cache else None
+    service = ScoringService(embedding_cache=embedding_cache, workers=args.workers, max_queue=args.max_queue,
+                             warm_modes=[mode for mode in args.warm_modes.split(',') if mode],
+                             policy_state=args.policy_state,
+                             feedback_log=args.feedback_log or (args.policy_state and
+                                                                os.path.splitext(args.policy_state)[0] + '.feedback.jsonl'))
+    uvicorn.run(service, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
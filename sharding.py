@@ -0,0 +1,153 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from assignment_table import AssignmentTable
+from embeddings import normalize_embeddings
+from optimization import (engineer_capacities, greedy_workload_assignment, rebalance_assignment,
+                          solve_capacitated_assignment)
+from profiling import traced
+
+SHARD_STRATEGIES = ('epic', 'cluster')
+SHARD_SOLVERS = ('greedy', 'lap')
+
+
+def epic_shards(story_plan):
+    # A story shared by several epics goes with the first one it appears in.
+    return np.array([epic_indices[0] for epic_indices in story_plan.story_epics], dtype=np.int64)
+
+
+def cluster_shards(similarities, num_shards, seed=0, iterations=10):
+    # Spherical k-means over each story's centered engineer-score profile, so stories that
+    # compete for the same engineers land in the same shard.
+    similarities = np.asarray(similarities, dtype=np.float32)
+    num_shards = max(1, min(num_shards, len(similarities)))
+    profiles = normalize_embeddings(similarities - similarities.mean(axis=1, keepdims=True))
+    rng = np.random.default_rng(seed)
+    centroids = profiles[rng.choice(len(profiles), num_shards, replace=False)]
+    for _ in range(iterations):
+        labels = np.argmax(profiles @ centroids.T, axis=1)
+        for shard in range(num_shards):
+            members = profiles[labels == shard]
+            if len(members):
+                centroids[shard] = normalize_embeddings(members.mean(axis=0))
+    return np.argmax(profiles @ centroids.T, axis=1)
+
+
+def split_capacities(capacities, shard_sizes, demand=None, iterations=50):
+    # Divides each engineer's capacity across shards. `demand` (shards x engineers, e.g. how
+    # many of a shard's stories prefer each engineer) is scaled so rows match shard sizes and
+    # columns match capacities (Sinkhorn balancing), so shards that compete for the same
+    # engineers get a larger share of them; without it the split is proportional to size.
+    # Rounding is largest remainder (ties to the earlier shard); shards still short of room
+    # are topped up evenly and the rebalancing pass removes any overflow this causes.
+    capacities = np.asarray(capacities, dtype=np.int64)
+    shard_sizes = np.asarray(shard_sizes, dtype=np.float64)
+    exact = np.outer(shard_sizes, capacities).astype(np.float64) / max(1.0, shard_sizes.sum())
+    if demand is not None:
+        exact = np.asarray(demand, dtype=np.float64) + exact / max(1, len(capacities))
+        targets = shard_sizes * capacities.sum() / max(1.0, shard_sizes.sum())
+        for _ in range(iterations):
+            exact *= (capacities / np.maximum(exact.sum(axis=0), 1e-12))[np.newaxis, :]
+            exact *= (targets / np.maximum(exact.sum(axis=1), 1e-12))[:, np.newaxis]
+        exact *= (capacities / np.maximum(exact.sum(axis=0), 1e-12))[np.newaxis, :]
+    budgets = np.floor(exact).astype(np.int64)
+    remainders = capacities - budgets.sum(axis=0)
+    order = np.argsort(-(exact - budgets), axis=0, kind='stable')
+    for engineer in np.flatnonzero(remainders > 0):
+        budgets[order[:remainders[engineer], engineer], engineer] += 1
+    for shard, size in enumerate(shard_sizes.astype(np.int64)):
+        shortfall = size - budgets[shard].sum()
+        if shortfall > 0:
+            budgets[shard] += -(-shortfall // len(capacities))
+    return budgets
+
+
+def shard_demand(similarities, shard_rows):
+    # Per shard, how many stories rank each engineer first.
+    preferred = np.argmax(similarities, axis=1)
+    return np.array([np.bincount(preferred[rows], minlength=similarities.shape[1]) for rows in shard_rows])
+
+
+def solve_shard(similarities, capacities, solver):
+    if solver == 'lap':
+        return solve_capacitated_assignment(similarities, capacities)
+    chosen, _ = greedy_workload_assignment(similarities, capacities=capacities)
+    return chosen
+
+
+# Splits one PRD's stories into shards (by epic or by similarity cluster), solves every
+# shard with its share of each engineer's capacity on a process pool, then runs one global
+# rebalancing pass. Shards are solved independently and merged in shard order, so the result
+# depends only on the inputs and seed, not on the number of processes.
+class ShardedAssigner:
+    def __init__(self, shard_by='epic', num_shards=None, processes=None, seed=0):
+        if shard_by not in SHARD_STRATEGIES:
+            raise ValueError(f"Unknown shard strategy '{shard_by}', expected one of {SHARD_STRATEGIES}")
+        self.shard_by = shard_by
+        self.processes = os.cpu_count() if processes is None else processes
+        self.num_shards = num_shards or max(1, self.processes)
+        self.seed = seed
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            logging.info("Started assignment shard pool with %d processes", self.processes)
+        return self._executor
+
+    def shard_labels(self, similarities, story_plan=None):
+        if self.shard_by == 'epic' and story_plan is not None:
+            return epic_shards(story_plan)
+        if self.shard_by == 'epic':
+            logging.warning("No story plan to shard by epic; clustering stories instead")
+        return cluster_shards(similarities, self.num_shards, self.seed)
+
+    @traced('sharded_assignment', items=lambda self, stories, *args, **kwargs: len(stories))
+    def assign(self, stories, engineers, similarities, solver='greedy', story_plan=None, capacities=None):
+        if solver not in SHARD_SOLVERS:
+            raise ValueError(f"Unknown shard solver '{solver}', expected one of {SHARD_SOLVERS}")
+        similarities = np.asarray(similarities, dtype=np.float64)
+        if capacities is None:
+            capacities = engineer_capacities(engineers, len(stories))
+        capacities = np.asarray(capacities, dtype=np.int64)
+        if capacities.sum() < len(stories):
+            raise ValueError(f"Engineer capacity ({capacities.sum()}) is lower than the number of tasks ({len(stories)})")
+
+        if not len(stories):
+            return AssignmentTable.from_similarities(stories, engineers, np.empty(0, dtype=np.int64), similarities)
+        labels = self.shard_labels(similarities, story_plan)
+        shard_ids, labels = np.unique(labels, return_inverse=True)
+        shard_rows = [np.flatnonzero(labels == shard) for shard in range(len(shard_ids))]
+        budgets = split_capacities(capacities, [len(rows) for rows in shard_rows],
+                                   shard_demand(similarities, shard_rows))
+
+        if self.processes <= 1 or len(shard_rows) <= 1:
+            results = [solve_shard(similarities[rows], budget, solver) for rows, budget in zip(shard_rows, budgets)]
+        else:
+            futures = [self._pool().submit(solve_shard, similarities[rows], budget, solver)
+                       for rows, budget in zip(shard_rows, budgets)]
+            results = [future.result() for future in futures]
+
+        chosen = np.empty(len(stories), dtype=np.int64)
+        for rows, shard_chosen in zip(shard_rows, results):
+            chosen[rows] = shard_chosen
+        chosen, moves = rebalance_assignment(similarities, chosen, capacities)
+        logging.info("Sharded assignment: %d stories in %d %s shards (%s), %d moved by rebalancing",
+                     len(stories), len(shard_rows), self.shard_by, solver, moves)
+        return AssignmentTable.from_similarities(stories, engineers, chosen, similarities)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
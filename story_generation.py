@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import re
+import string
+import unicodedata
+
+import numpy as np
+
+from profiling import traced
+
+DEFAULT_STORY_TEMPLATE = "As a user, I want {requirement} so that I can improve productivity."
+DEFAULT_EPIC_TEMPLATE = "Epic: {epic}"
+TEMPLATE_FIELDS = {'requirement', 'epic'}
+DEDUPE_MODES = ('exact', 'minhash', 'none')
+MERSENNE_PRIME = (1 << 31) - 1
+
+_story_config = {'template': DEFAULT_STORY_TEMPLATE, 'dedupe': 'exact', 'minhash_threshold': 0.8}
+
+
+class StoryTemplate:
+    # Parsed and validated once; rendering is a bound str.format.
+    def __init__(self, template=DEFAULT_STORY_TEMPLATE):
+        fields = {field for _, field, _, _ in string.Formatter().parse(template) if field is not None}
+        unknown = fields - TEMPLATE_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown template fields {sorted(unknown)}, expected some of {sorted(TEMPLATE_FIELDS)}")
+        self.template = template
+        self.render = template.format
+
+
+def normalize_requirement(text):
+    # Exact dedupe key: case and whitespace only, so "C++" and "C#" stay different requirements.
+    return ' '.join(unicodedata.normalize('NFKC', text).lower().split())
+
+
+def text_id(normalized, prefix='S'):
+    return f"{prefix}-{hashlib.blake2b(normalized.encode('utf-8'), digest_size=6).hexdigest()}"
+
+
+class MinHasher:
+    # MinHash signatures over word bigram shingles with LSH banding, so near-duplicate
+    # candidates are found without comparing every pair of requirements.
+    def __init__(self, num_perm=64, bands=16, seed=0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, normalized):
+        words = re.findall(r'\w+', normalized)
+        shingles = {' '.join(words[idx:idx + 2]) for idx in range(max(1, len(words) - 1))}
+        hashes = np.array([int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+                           & MERSENNE_PRIME for shingle in shingles], dtype=np.uint64)
+        return ((np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME).min(axis=0)
+
+    def duplicates(self, normalized_texts, threshold):
+        # Maps each text index to the earliest index whose estimated Jaccard similarity reaches threshold.
+        signatures = np.array([self.signature(text) for text in normalized_texts]).reshape(len(normalized_texts), -1)
+        canonical = list(range(len(normalized_texts)))
+
+        def find(idx):
+            while canonical[idx] != idx:
+                canonical[idx] = canonical[canonical[idx]]
+                idx = canonical[idx]
+            return idx
+
+        rows = self.num_perm // self.bands
+        for band in range(self.bands):
+            buckets = {}
+            for idx, signature in enumerate(signatures):
+                buckets.setdefault(signature[band * rows:(band + 1) * rows].tobytes(), []).append(idx)
+            for members in buckets.values():
+                for idx in members[1:]:
+                    first, root = find(members[0]), find(idx)
+                    if first != root and np.mean(signatures[first] == signatures[root]) >= threshold:
+                        canonical[max(first, root)] = min(first, root)
+        return [find(idx) for idx in range(len(normalized_texts))]
+
+
+# Epics, unique stories and the epics each story belongs to.
+class StoryPlan:
+    __slots__ = ('epics', 'user_stories', 'story_ids', 'story_epics', 'epic_names')
+
+    def __init__(self, epics, user_stories, story_ids, story_epics, epic_names):
+        self.epics = epics
+        self.user_stories = user_stories
+        self.story_ids = story_ids
+        self.story_epics = story_epics
+        self.epic_names = epic_names
+
+    def __len__(self):
+        return len(self.user_stories)
+
+    def epic_stories(self):
+        stories = {epic: [] for epic in self.epic_names}
+        for story_idx, epic_indices in enumerate(self.story_epics):
+            for epic_idx in epic_indices:
+                stories[self.epic_names[epic_idx]].append(self.story_ids[story_idx])
+        return stories
+
+
+def configure_story_generation(template=None, dedupe='exact', minhash_threshold=0.8):
+    # Process-wide defaults for every caller of generate_story_plan (CLI, batch, service, app).
+    if dedupe not in DEDUPE_MODES:
+        raise ValueError(f"Unknown dedupe mode '{dedupe}', expected one of {DEDUPE_MODES}")
+    _story_config['template'] = StoryTemplate(template or DEFAULT_STORY_TEMPLATE)
+    _story_config['dedupe'] = dedupe
+    _story_config['minhash_threshold'] = minhash_threshold
+
+
+@traced('generate_epics_and_stories',
+        items=lambda sections, *args, **kwargs: sum(len(reqs) for reqs in
+                                                     sections.get('functional_requirements', {}).values()))
+def generate_story_plan(sections, template=None, epic_template=DEFAULT_EPIC_TEMPLATE, dedupe=None,
+                        minhash_threshold=None, minhasher=None):
+    dedupe = dedupe or _story_config['dedupe']
+    minhash_threshold = minhash_threshold or _story_config['minhash_threshold']
+    if dedupe not in DEDUPE_MODES:
+        raise ValueError(f"Unknown dedupe mode '{dedupe}', expected one of {DEDUPE_MODES}")
+    template = template or _story_config['template']
+    if not isinstance(template, StoryTemplate):
+        template = StoryTemplate(template)
+    functional_requirements = sections.get('functional_requirements', {})
+    epic_names = list(functional_requirements)
+    epics = [epic_template.format(epic=epic) for epic in epic_names]
+
+    requirements = [(epic_idx, req) for epic_idx, epic in enumerate(epic_names)
+                    for req in functional_requirements[epic]]
+    normalized = [normalize_requirement(req) for _, req in requirements]
+    if dedupe == 'none':
+        canonical = list(range(len(requirements)))
+    else:
+        first_seen = {}
+        canonical = [first_seen.setdefault(text, idx) for idx, text in enumerate(normalized)]
+        if dedupe == 'minhash' and requirements:
+            exact_rows = sorted(set(canonical))
+            near = (minhasher or MinHasher()).duplicates([normalized[idx] for idx in exact_rows], minhash_threshold)
+            remap = {row: exact_rows[near[pos]] for pos, row in enumerate(exact_rows)}
+            canonical = [remap[row] for row in canonical]
+
+    user_stories, story_ids, story_epics = [], [], []
+    story_of_row = {}
+    seen_ids = {}
+    for idx, (epic_idx, req) in enumerate(requirements):
+        row = canonical[idx]
+        if row not in story_of_row:
+            story_of_row[row] = len(user_stories)
+            user_stories.append(template.render(requirement=requirements[row][1], epic=epic_names[requirements[row][0]]))
+            story_id = text_id(normalized[row])
+            if dedupe == 'none':
+                # Without dedupe identical texts can repeat, so later copies get an occurrence suffix.
+                seen_ids[story_id] = seen_ids.get(story_id, 0) + 1
+                story_id = story_id if seen_ids[story_id] == 1 else f"{story_id}-{seen_ids[story_id] - 1}"
+            story_ids.append(story_id)
+            story_epics.append([])
+        story_idx = story_of_row[row]
+        if epic_idx not in story_epics[story_idx]:
+            story_epics[story_idx].append(epic_idx)
+
+    if len(user_stories) < len(requirements):
+        logging.info("Collapsed %d requirements into %d unique stories (%s dedupe)",
+                     len(requirements), len(user_stories), dedupe)
+    return StoryPlan(epics, user_stories, story_ids, story_epics, epic_names)
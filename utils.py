@@ -1,124 +1,117 @@
-import json
-import pandas as pd
 import logging
-import matplotlib.pyplot as plt
+import os
+import time
 import numpy as np
-from sklearn.metrics import precision_score, recall_score, f1_score
-from nltk.translate.bleu_score import sentence_bleu
-from rouge_score import rouge_scorer
-from sentence_transformers import SentenceTransformer, util
+from lexical_metrics import score_pairs
+from embeddings import DEFAULT_MODEL_NAME, encode_texts, normalize_embeddings
+from exporters import build_eda_figures, run_exports, save_figures
+from assignment_table import as_assignment_table
+from ingestion import iter_json_documents, load_document
+from profiling import traced
+from story_generation import generate_story_plan
 
 class PRDIngestionJSON:
     def __init__(self, prd_file):
         self.prd_file = prd_file
 
     def load_prd(self):
-        with open(self.prd_file, 'r') as file:
-            return json.load(file)
+        # JSON, Markdown or PDF; see ingestion.INGESTORS.
+        return load_document(self.prd_file)
 
 def load_engineers(engineer_profiles):
-    with open(engineer_profiles, 'r') as file:
-        return json.load(file)
+    return list(iter_json_documents(engineer_profiles))
 
 def generate_epics_and_stories(sections):
-    epics = []
-    user_stories = []
-    functional_requirements = sections.get('functional_requirements', {})
-
-    for epic, requirements in functional_requirements.items():
-        epics.append(f"Epic: {epic}")
-        for req in requirements:
-            user_story = f"As a user, I want {req} so that I can improve productivity."
-            user_stories.append(user_story)
-
-    return epics, user_stories
-
-def save_output(epics, user_stories, assignments, file_prefix='output'):
-    output_data = {
-        'epics': epics,
-        'user_stories': user_stories,
-        'assignments': assignments
-    }
-
-    json_file = f"{file_prefix}.json"
-    with open(json_file, 'w') as json_outfile:
-        json.dump(output_data, json_outfile, indent=4)
-
-    df_epics = pd.DataFrame(epics, columns=['Epics'])
-    df_stories = pd.DataFrame(user_stories, columns=['User Stories'])
-    df_assignments = pd.DataFrame(assignments, columns=['User Story', 'Assigned Engineer'])
-
-    excel_file = f"{file_prefix}.xlsx"
-    with pd.ExcelWriter(excel_file, engine='xlsxwriter') as writer:
-        df_epics.to_excel(writer, sheet_name='Epics', index=False)
-        df_stories.to_excel(writer, sheet_name='User Stories', index=False)
-        df_assignments.to_excel(writer, sheet_name='Assignments', index=False)
-
-def evaluate_assignments(assignments, engineers, sections, prd_data):
+    # Unique stories only; generate_story_plan keeps the epic membership and story ids.
+    plan = generate_story_plan(sections)
+    return plan.epics, plan.user_stories
+
+@traced('save_output', items=lambda epics, user_stories, assignments, *args, **kwargs: len(assignments))
+def save_output(epics, user_stories, assignments, file_prefix='output', formats=('json', 'xlsx')):
+    return run_exports(file_prefix, formats, epics, user_stories, assignments)
+
+EVALUATION_SUITES = ('workload', 'sampled', 'full')
+
+@traced('evaluate_assignments', items=lambda assignments, *args, **kwargs: len(assignments))
+def evaluate_assignments(assignments, engineers, sections, prd_data, embedding_cache=None,
+                         metrics='full', sample_size=50, similarities=None, timings=None, seed=0,
+                         model_name=DEFAULT_MODEL_NAME, lexical_engine=None):
+    if metrics not in EVALUATION_SUITES:
+        raise ValueError(f"Unknown evaluation suite '{metrics}', expected one of {EVALUATION_SUITES}")
     evaluation_results = {}
+    timings = {} if timings is None else timings
 
-    skill_scores = []
-    for story, engineer in assignments:
-        task_embedding = util.pytorch_cos_sim(
-            SentenceTransformer('all-MiniLM-L6-v2').encode(story, convert_to_tensor=True),
-            SentenceTransformer('all-MiniLM-L6-v2').encode(engineers[0]['skills'], convert_to_tensor=True)
-        )
-        skill_scores.append(task_embedding.item())
-    skill_match_score = np.mean(skill_scores)
-    evaluation_results["Skill Match Score"] = skill_match_score
-
-    engineer_workloads = {eng['name']: 0 for eng in engineers}
-    for _, engineer in assignments:
-        engineer_workloads[engineer] += 1
-    workload_variance = np.var(list(engineer_workloads.values()))
+    start = time.perf_counter()
+    assignments = as_assignment_table(assignments, engineers)
+    engineer_workloads = assignments.workloads()
+    workload_variance = np.var(engineer_workloads)
     evaluation_results["Workload Variance"] = workload_variance
 
-    sorted_workloads = sorted(engineer_workloads.values())
+    sorted_workloads = sorted(engineer_workloads.tolist())
     n = len(sorted_workloads)
-    gini = (2 * sum((i + 1) * wl for i, wl in enumerate(sorted_workloads)) / (n * sum(sorted_workloads))) - (n + 1) / n
+    total_workload = sum(sorted_workloads)
+    # No assigned stories (e.g. a PRD without functional requirements) is a perfectly even split.
+    gini = 0.0
+    if total_workload:
+        gini = (2 * sum((i + 1) * wl for i, wl in enumerate(sorted_workloads)) / (n * total_workload)) - (n + 1) / n
     evaluation_results["Gini Coefficient of Workload"] = gini
-
+    timings["Workload"] = time.perf_counter() - start
+
+    if metrics == 'workload':
+        logging.info("Evaluation timings (%s): %s", metrics, timings)
+        return evaluation_results
+
+    start = time.perf_counter()
+    story_indices = np.arange(len(assignments))
+    if metrics == 'sampled' and len(assignments) > sample_size:
+        story_indices = np.sort(np.random.default_rng(seed).choice(len(assignments), sample_size, replace=False))
+    assigned = assignments.engineer_indices[story_indices]
+    if not len(story_indices):
+        skill_scores = np.zeros(0)
+    elif similarities is not None:
+        # Rows line up with the assignment order, so the assignment-time scores are reused as-is.
+        skill_scores = np.asarray(similarities)[story_indices, assigned]
+    elif assignments.scores is not None:
+        # Shortlist assignments carry the cosine score of each pick, so no full matrix is rebuilt.
+        skill_scores = assignments.scores[story_indices]
+    else:
+        skill_texts = [eng['skills'] for eng in engineers]
+        story_texts = assignments.story_texts()
+        embeddings = encode_texts(skill_texts + [story_texts[idx] for idx in story_indices],
+                                  model_name=model_name, cache=embedding_cache)
+        story_embeddings = normalize_embeddings(embeddings[len(skill_texts):])
+        skill_embeddings = normalize_embeddings(embeddings[:len(skill_texts)])[assigned]
+        skill_scores = np.einsum('ij,ij->i', story_embeddings, skill_embeddings)
+    evaluation_results["Skill Match Score"] = np.mean(skill_scores) if len(skill_scores) else 0.0
+    timings["Skill Match Score"] = time.perf_counter() - start
+
+    start = time.perf_counter()
     reference_sections = [' '.join(sections['objectives']), ' '.join(sections['user_personas'])]
     predicted_sections = [' '.join(prd_data.get('objectives', [])), ' '.join(prd_data.get('user_personas', []))]
-    bleu_score = np.mean([sentence_bleu([ref.split()], pred.split()) for ref, pred in zip(reference_sections, predicted_sections)])
-    evaluation_results["BLEU Score"] = bleu_score
-
-    rouge_scorer_instance = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
-    rouge_scores = [rouge_scorer_instance.score(ref, pred) for ref, pred in zip(reference_sections, predicted_sections)]
-    avg_rouge_score = np.mean([score['rouge1'].fmeasure for score in rouge_scores])
-    evaluation_results["ROUGE Score"] = avg_rouge_score
-
-    semantic_sim_model = SentenceTransformer('all-MiniLM-L6-v2')
-    ref_embeddings = semantic_sim_model.encode(reference_sections, convert_to_tensor=True)
-    pred_embeddings = semantic_sim_model.encode(predicted_sections, convert_to_tensor=True)
-    semantic_sim_score = np.mean(util.pytorch_cos_sim(ref_embeddings, pred_embeddings).diagonal().tolist())
+    pairs = list(zip(reference_sections, predicted_sections))
+    # BLEU and ROUGE share one pass; with an engine the pairs are scored in its process pool.
+    lexical_scores = score_pairs(pairs) if lexical_engine is None else lexical_engine.score(pairs)
+    evaluation_results["BLEU Score"] = np.mean([bleu for bleu, _ in lexical_scores])
+    evaluation_results["ROUGE Score"] = np.mean([rouge for _, rouge in lexical_scores])
+    timings["BLEU/ROUGE Scores"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    section_embeddings = normalize_embeddings(encode_texts(reference_sections + predicted_sections,
+                                                           model_name=model_name, cache=embedding_cache))
+    ref_embeddings = section_embeddings[:len(reference_sections)]
+    pred_embeddings = section_embeddings[len(reference_sections):]
+    semantic_sim_score = np.mean(np.einsum('ij,ij->i', ref_embeddings, pred_embeddings))
     evaluation_results["Semantic Similarity Score"] = semantic_sim_score
+    timings["Semantic Similarity Score"] = time.perf_counter() - start
 
+    logging.info("Evaluation timings (%s): %s", metrics, timings)
     return evaluation_results
 
-def perform_eda(prd_data, engineers):
+@traced('perform_eda')
+def perform_eda(prd_data, engineers, output_dir='.'):
     logging.info("Performing EDA...")
-    product_name = prd_data.get('product_name', 'N/A')
-    objectives = len(prd_data.get('objectives', []))
-    functional_areas = len(prd_data.get('functional_requirements', {}))
-    engineer_count = len(engineers)
-    roles = [eng['role'] for eng in engineers]
-
-    plt.figure(figsize=(10, 6))
-    plt.bar(['Objectives', 'Functional Areas'], [objectives, functional_areas], color='purple')
-    plt.title(f'PRD Overview for {product_name}')
-    plt.xlabel('Categories')
-    plt.ylabel('Count')
-    plt.savefig('eda_prd_overview.png')
-    logging.info("Saved EDA plot as eda_prd_overview.png")
-
-    plt.figure(figsize=(10, 6))
-    plt.barh(roles, range(1, len(roles) + 1), color='green')
-    plt.title('Engineer Roles Distribution')
-    plt.xlabel('Role')
-    plt.ylabel('Count')
-    plt.savefig('eda_engineer_roles.png')
-    logging.info("Saved EDA plot as eda_engineer_roles.png")
+    figures = build_eda_figures(prd_data, engineers)
+    return save_figures(figures, lambda file_name: os.path.join(output_dir, file_name))
 
 # [2023-01-09] (Extraction) schedule note: Document PRD automation results for Extraction
 